@@ -3,30 +3,30 @@ import sys
 import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+import time
+# 모듈 불러오기 단계별 시각 (--profile-startup 보고용)
+_IMPORT_MARKS = [(None, time.perf_counter())]
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-from tkinter import simpledialog
-import json
-import numpy as np
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+import argparse
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from ttkthemes import ThemedTk
-import time
-from PIL import Image, ImageTk
 import os
-from surprise import Dataset, Reader, SVD
-from surprise.model_selection import cross_validate
 import logging
 from colorama import init, Fore, Style
-import threading
-from tqdm import tqdm
-import webbrowser
-from datetime import timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import seaborn as sns
-from collections import Counter
+_IMPORT_MARKS.append(("tkinter, ttkthemes, colorama", time.perf_counter()))
+
+# matplotlib은 트렌드 탭을 처음 열 때 불러온다
+from music_engine import MIN_RATINGS, MusicCatalog, RecommenderEngine, load_catalog, metrics, profiling
+from music_engine.history import HistoryIndex, RatingHistoryLog, migrate_json_history
+from music_engine.stats import load_stats
+from music_engine.storage import open_storage
+from music_engine.tuning import load_tuned_params
+from music_engine.worker import BackgroundWorker
+_IMPORT_MARKS.append(("music_engine (numpy, pandas)", time.perf_counter()))
 
 # 로깅 설정
 init()  # colorama 초기화
@@ -36,6 +36,29 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# 추천 방식 표시 이름 -> 엔진 추천 방식
+METHOD_KEYS = {
+    "협업 필터링": "cf",
+    "장르 기반": "genre",
+    "아티스트 기반": "artist",
+    "아이템 기반": "item",
+    "하이브리드": "hybrid"
+}
+
+# 추이 차트 시간 구간 표시 이름과 구간 길이(일)
+TREND_BUCKET_LABELS = {"hour": "시간별", "day": "일별", "week": "주별"}
+TREND_BUCKET_DAYS = {"hour": 1 / 24, "day": 1, "week": 7}
+
+# 히스토리 목록 정렬 표시 이름 -> 색인 정렬 방식, 한 번에 보여줄 줄 수
+HISTORY_SORT_KEYS = {
+    "최신순": "newest",
+    "오래된순": "oldest",
+    "평점 높은순": "rating_desc",
+    "평점 낮은순": "rating_asc",
+    "장르순": "genre"
+}
+HISTORY_PAGE_SIZE = 20
+
 def create_music_icon():
     if not os.path.exists('assets'):
         os.makedirs('assets')
@@ -62,70 +85,90 @@ class ModernStyle:
         'small': ('Helvetica', 9)
     }
 
+class StartupProfile:
+    """시작 단계별 소요 시간 (모듈 불러오기, 데이터/GUI 초기화, 탭 생성, 백그라운드 SVD 준비)"""
+    
+    def __init__(self, import_marks=()):
+        self.started = import_marks[0][1] if import_marks else time.perf_counter()
+        self.phases = [
+            (f"import {name}", end - start)
+            for (_, start), (name, end) in zip(import_marks, import_marks[1:])
+        ]
+        self._lock = threading.Lock()
+        
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+            
+    def add(self, name, seconds):
+        with self._lock:
+            self.phases.append((name, seconds))
+            
+    def since_start(self):
+        return time.perf_counter() - self.started
+        
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+        width = max(len(name) for name, _ in phases)
+        lines = [f"{name:<{width}}  {seconds * 1000:9.1f}ms" for name, seconds in phases]
+        return "시작 단계별 소요 시간\n" + "\n".join(lines)
+
 class MusicRecommender:
-    def __init__(self):
+    def __init__(self, catalog_path=None, profile_startup=False):
         self.style = ModernStyle()
-        self.setup_data()
-        self.setup_gui()
-        self.load_rating_history()
-        self.svd_model = None
+        self.profile = StartupProfile(_IMPORT_MARKS)
+        self.profile_startup = profile_startup
+        self.setup_data(catalog_path)
+        with self.profile.phase("GUI 초기화"):
+            self.setup_gui()
+        self.warm_up_models()
+        
+        # 창이 처음 그려진 뒤에 환영 메시지를 띄운다
+        self.root.after_idle(self.on_first_idle)
+        
+    def on_first_idle(self):
+        self.profile.add("첫 화면까지 (프로세스 시작부터)", self.profile.since_start())
+        if self.profile_startup:
+            self.report_startup()
         self.show_welcome_message()
         
-    def setup_data(self):
-        logging.info("음악 데이터베이스 초기화 중...")
-        
-        # 장르별 음악 데이터
-        self.music_data = {
-            "K-POP": [
-                {"title": "Dynamite", "artist": "BTS", "genre": "K-POP"},
-                {"title": "How You Like That", "artist": "BLACKPINK", "genre": "K-POP"},
-                {"title": "Ditto", "artist": "NewJeans", "genre": "K-POP"},
-                {"title": "Love Dive", "artist": "IVE", "genre": "K-POP"},
-                {"title": "After LIKE", "artist": "IVE", "genre": "K-POP"}
-            ],
-            "POP": [
-                {"title": "Shape of You", "artist": "Ed Sheeran", "genre": "POP"},
-                {"title": "Anti-Hero", "artist": "Taylor Swift", "genre": "POP"},
-                {"title": "Starboy", "artist": "The Weeknd", "genre": "POP"},
-                {"title": "As It Was", "artist": "Harry Styles", "genre": "POP"},
-                {"title": "Blinding Lights", "artist": "The Weeknd", "genre": "POP"}
-            ],
-            "Rock": [
-                {"title": "Believer", "artist": "Imagine Dragons", "genre": "Rock"},
-                {"title": "Bohemian Rhapsody", "artist": "Queen", "genre": "Rock"},
-                {"title": "Do I Wanna Know?", "artist": "Arctic Monkeys", "genre": "Rock"},
-                {"title": "Thunder", "artist": "Imagine Dragons", "genre": "Rock"},
-                {"title": "We Will Rock You", "artist": "Queen", "genre": "Rock"}
-            ],
-            "Hip-Hop": [
-                {"title": "God's Plan", "artist": "Drake", "genre": "Hip-Hop"},
-                {"title": "HUMBLE.", "artist": "Kendrick Lamar", "genre": "Hip-Hop"},
-                {"title": "SICKO MODE", "artist": "Travis Scott", "genre": "Hip-Hop"},
-                {"title": "Hotline Bling", "artist": "Drake", "genre": "Hip-Hop"},
-                {"title": "goosebumps", "artist": "Travis Scott", "genre": "Hip-Hop"}
-            ],
-            "R&B": [
-                {"title": "Kill Bill", "artist": "SZA", "genre": "R&B"},
-                {"title": "Pink + White", "artist": "Frank Ocean", "genre": "R&B"},
-                {"title": "Best Part", "artist": "Daniel Caesar", "genre": "R&B"},
-                {"title": "Good Days", "artist": "SZA", "genre": "R&B"},
-                {"title": "Get You", "artist": "Daniel Caesar", "genre": "R&B"}
-            ]
-        }
+    def report_startup(self):
+        # 백그라운드 SVD 준비가 끝날 때까지 기다렸다가 보고한다
+        if self.rec_worker.busy and not self.warm_up_done.is_set():
+            self.root.after(100, self.report_startup)
+            return
+        logging.info(self.profile.report())
         
-        # 사용자 데이터 초기화
-        self.ratings = pd.DataFrame(columns=['user_id', 'song_id', 'rating', 'timestamp'])
-        self.current_user_id = 1
+    def setup_data(self, catalog_path=None):
+        # 평가 기록 로그 (기존 rating_history.json은 한 번만 변환)
+        with self.profile.phase("평가 기록 로그"):
+            migrate_json_history()
+            self.history_log = RatingHistoryLog()
         
-        # 곡 ID 매핑 생성
-        self.song_id_mapping = {}
-        song_id = 0
-        for genre in self.music_data:
-            for song in self.music_data[genre]:
-                song_key = f"{song['title']} - {song['artist']}"
-                self.song_id_mapping[song_key] = song_id
-                song_id += 1
+        self.current_user_id = 1
         
+        # 평가/플레이리스트 저장소 (처음 열 때 기존 평가 기록과 플레이리스트 파일을 옮긴다)
+        with self.profile.phase("카탈로그와 저장소"):
+            catalog = load_catalog(catalog_path) if catalog_path else MusicCatalog()
+            self.storage = open_storage(catalog=catalog, history_log=self.history_log,
+                                        user_id=self.current_user_id)
+        
+        # 추천 엔진 생성 (GUI와 독립적으로 동작, 저장된 평가를 한 번에 읽고 탐색해 둔 SVD 설정이 있으면 사용)
+        # 저장된 SVD 모델은 warm_up_models에서 백그라운드로 불러온다
+        with self.profile.phase("추천 엔진 (평가 불러오기)"):
+            self.engine = RecommenderEngine(catalog, svd_params=load_tuned_params(), model_path='svd_model',
+                                            storage=self.storage)
+        self.catalog = self.engine.catalog
+        self.ratings = self.engine.ratings
+        
+        # 통계/트렌드 탭용 누적 통계 (저장된 상태 이후의 기록만 반영)
+        with self.profile.phase("평가 통계"):
+            self.stats = load_stats(self.history_log, catalog=self.catalog)
         logging.info(f"{Fore.GREEN}데이터베이스 초기화 완료{Style.RESET_ALL}")
         
     def setup_gui(self):
@@ -164,27 +207,21 @@ class MusicRecommender:
         # 탭 컨트롤
         self.tab_control = ttk.Notebook(self.main_frame)
         
-        # 평가 탭
+        # 탭 프레임만 먼저 만들고 내용은 처음 선택될 때 만든다
         self.rating_tab = ttk.Frame(self.tab_control)
-        self.setup_rating_tab()
-        
-        # 추천 탭
         self.recommendation_tab = ttk.Frame(self.tab_control)
-        self.setup_recommendation_tab()
-        
-        # 히스토리 탭
         self.history_tab = ttk.Frame(self.tab_control)
-        self.setup_history_tab()
-        
-        # 통계 탭
         self.stats_tab = ttk.Frame(self.tab_control)
-        self.setup_stats_tab()
-        
-        # 새로운 탭 추가
         self.playlist_tab = ttk.Frame(self.tab_control)
         self.trends_tab = ttk.Frame(self.tab_control)
-        self.setup_playlist_tab()
-        self.setup_trends_tab()
+        self.tab_builders = {
+            str(self.rating_tab): self.setup_rating_tab,
+            str(self.recommendation_tab): self.setup_recommendation_tab,
+            str(self.history_tab): self.setup_history_tab,
+            str(self.stats_tab): self.setup_stats_tab,
+            str(self.playlist_tab): self.setup_playlist_tab,
+            str(self.trends_tab): self.setup_trends_tab,
+        }
         
         self.tab_control.add(self.rating_tab, text="음악 평가")
         self.tab_control.add(self.recommendation_tab, text="추천")
@@ -193,6 +230,15 @@ class MusicRecommender:
         self.tab_control.add(self.playlist_tab, text="🎼 플레이리스트")
         self.tab_control.add(self.trends_tab, text="📈 트렌드")
         self.tab_control.pack(expand=True, fill="both")
+        self.tab_control.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.on_tab_changed()
+        
+        # 추천 계산과 SVD 준비용 백그라운드 작업 스레드 (하나만 유지)
+        self.rec_worker = BackgroundWorker('recommendation-worker')
+        self.rec_progress = None
+        self.rec_request = None
+        self.rec_polling = False
+        self.warm_up_done = threading.Event()
         
         logging.info(f"{Fore.GREEN}GUI 초기화 완료{Style.RESET_ALL}")
         
@@ -200,7 +246,7 @@ class MusicRecommender:
         # 장르 선택
         ttk.Label(self.rating_tab, text="장르 선택:").pack(pady=10)
         self.genre_var = tk.StringVar()
-        genre_combo = ttk.Combobox(self.rating_tab, textvariable=self.genre_var, values=list(self.music_data.keys()))
+        genre_combo = ttk.Combobox(self.rating_tab, textvariable=self.genre_var, values=self.catalog.genres)
         genre_combo.pack(pady=5)
         genre_combo.bind('<<ComboboxSelected>>', self.update_songs)
         
@@ -237,7 +283,7 @@ class MusicRecommender:
         rec_method_combo = ttk.Combobox(
             method_frame,
             textvariable=self.rec_method_var,
-            values=["협업 필터링", "장르 기반", "아티스트 기반", "하이브리드"],
+            values=list(METHOD_KEYS.keys()),
             width=20
         )
         rec_method_combo.pack(side=tk.LEFT, padx=(5, 0))
@@ -298,14 +344,70 @@ class MusicRecommender:
         self.rec_result.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
     def setup_history_tab(self):
-        # 히스토리 표시
-        self.history_text = tk.Text(self.history_tab, height=20, width=50)
-        self.history_text.pack(pady=10)
+        # 필터/정렬 (로그 전체를 다시 읽지 않고 색인으로 조회)
+        controls = ttk.Frame(self.history_tab)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        
+        ttk.Label(controls, text="장르").pack(side=tk.LEFT)
+        self.history_genre_var = tk.StringVar(value="전체")
+        self.history_genre_combo = ttk.Combobox(
+            controls, textvariable=self.history_genre_var, values=["전체"], width=10, state="readonly"
+        )
+        self.history_genre_combo.pack(side=tk.LEFT, padx=(2, 8))
+        
+        ttk.Label(controls, text="평점").pack(side=tk.LEFT)
+        self.history_rating_var = tk.StringVar(value="전체")
+        ttk.Combobox(
+            controls, textvariable=self.history_rating_var,
+            values=["전체", "5", "4", "3", "2", "1"], width=5, state="readonly"
+        ).pack(side=tk.LEFT, padx=(2, 8))
+        
+        ttk.Label(controls, text="기간").pack(side=tk.LEFT)
+        self.history_from_var = tk.StringVar()
+        self.history_to_var = tk.StringVar()
+        ttk.Entry(controls, textvariable=self.history_from_var, width=11).pack(side=tk.LEFT, padx=2)
+        ttk.Label(controls, text="~").pack(side=tk.LEFT)
+        ttk.Entry(controls, textvariable=self.history_to_var, width=11).pack(side=tk.LEFT, padx=(2, 8))
+        
+        self.history_sort_var = tk.StringVar(value="최신순")
+        ttk.Combobox(
+            controls, textvariable=self.history_sort_var,
+            values=list(HISTORY_SORT_KEYS.keys()), width=10, state="readonly"
+        ).pack(side=tk.LEFT, padx=(0, 8))
+        
+        ttk.Button(controls, text="적용", command=self.refresh_history).pack(side=tk.LEFT)
+        
+        # 보이는 줄만 만드는 가상 목록 (스크롤하면 해당 위치의 기록만 로그에서 읽는다)
+        list_frame = ttk.Frame(self.history_tab)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        columns = ("timestamp", "song", "genre", "rating")
+        self.history_tree = ttk.Treeview(
+            list_frame, columns=columns, show="headings", height=HISTORY_PAGE_SIZE, selectmode="browse"
+        )
+        for column, heading, width in zip(columns, ["시간", "곡", "장르", "평점"], [140, 260, 90, 110]):
+            self.history_tree.heading(column, text=heading)
+            self.history_tree.column(column, width=width, anchor=tk.W)
+        self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.history_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.scroll_history)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.history_tree.bind("<MouseWheel>", self.on_history_wheel)
+        self.history_tree.bind("<Button-4>", self.on_history_wheel)
+        self.history_tree.bind("<Button-5>", self.on_history_wheel)
+        
+        self.history_status = ttk.Label(self.history_tab, text="")
+        self.history_status.pack()
         
         # 새로고침 버튼
         refresh_btn = ttk.Button(self.history_tab, text="새로고침", command=self.refresh_history)
         refresh_btn.pack(pady=10)
         
+        self.history_index = HistoryIndex(self.history_log)
+        self.history_rows = []
+        self.history_start = 0
+        self.refresh_history()
+        
     def setup_stats_tab(self):
         # 통계 정보 표시
         self.stats_text = tk.Text(self.stats_tab, height=20, width=50)
@@ -383,13 +485,43 @@ class MusicRecommender:
         chart_frame = ttk.LabelFrame(container, text="트렌드 분석", style="Custom.TFrame")
         chart_frame.pack(fill=tk.BOTH, expand=True)
         
-        # 차트 캔버스
-        self.fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 5))
+        # matplotlib은 이 탭을 처음 열 때 불러온다 (pyplot 없이 Figure를 직접 만든다)
+        with self.profile.phase("import matplotlib"):
+            import matplotlib.dates as mdates
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.figure import Figure
+        
+        # 차트 캔버스 (축과 그래프 요소는 한 번만 만들고 이후에는 데이터만 바꾼다)
+        self.fig = Figure(figsize=(10, 5))
+        self.genre_ax, self.trend_ax = self.fig.subplots(1, 2)
         self.fig.patch.set_facecolor(self.style.COLORS['bg_dark'])
         
-        canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.genre_ax.set_title('장르별 평균 평점', color=self.style.COLORS['text'])
+        self.genre_ax.set_ylabel('평균 평점', color=self.style.COLORS['text'])
+        self.genre_ax.set_ylim(0, 5.2)
+        self.genre_ax.tick_params(colors=self.style.COLORS['text'])
+        self.genre_bars = None
+        self.genre_names = []
+        
+        self.trend_ax.set_title('평가 추이', color=self.style.COLORS['text'])
+        self.trend_ax.set_ylabel('평점', color=self.style.COLORS['text'])
+        self.trend_ax.set_ylim(0.8, 5.2)
+        date_locator = mdates.AutoDateLocator(maxticks=6)
+        self.trend_ax.xaxis.set_major_locator(date_locator)
+        self.trend_ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(date_locator))
+        self.trend_ax.tick_params(colors=self.style.COLORS['text'])
+        self.trend_line, = self.trend_ax.plot(
+            [], [], 'o-', color=self.style.COLORS['accent'], markersize=3, animated=True
+        )
+        self.trend_bucket = None
+        self.fig.tight_layout()
+        
+        # 변하는 요소(막대, 추이 선)만 animated로 두고 나머지는 배경으로 저장해 블리팅한다
+        self.trend_canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
+        self.trend_background = None
+        self.trend_canvas.mpl_connect('draw_event', self.on_trends_draw)
+        self.trend_canvas.draw()
+        self.trend_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # 업데이트 버튼
         ttk.Button(
@@ -399,11 +531,31 @@ class MusicRecommender:
             style="Custom.TButton"
         ).pack(pady=10)
 
+    def on_tab_changed(self, event=None):
+        # 처음 선택된 탭의 내용을 만든다
+        builder = self.tab_builders.pop(self.tab_control.select(), None)
+        if builder is not None:
+            with self.profile.phase(f"탭 생성: {self.tab_control.tab('current', 'text')}"):
+                builder()
+        
+    def warm_up_models(self):
+        # 저장된 SVD 모델을 불러오거나 미리 학습해 두어 첫 추천 요청이 학습을 기다리지 않게 한다
+        # (추천 요청과 같은 작업 스레드에서 실행되므로 모델을 동시에 고치지 않는다)
+        def warm_up():
+            try:
+                with self.profile.phase("SVD 준비 (백그라운드)"):
+                    self.engine.warm_start()
+                    if len(self.ratings) >= MIN_RATINGS:
+                        self.engine.recommenders['cf'].update()
+            finally:
+                self.warm_up_done.set()
+        
+        self.rec_worker.submit('warm-up', warm_up)
+        
     def update_songs(self, event=None):
         genre = self.genre_var.get()
-        if genre in self.music_data:
-            songs = [f"{song['title']} - {song['artist']}" for song in self.music_data[genre]]
-            self.song_combo['values'] = songs
+        if genre in self.catalog.genres:
+            self.song_combo['values'] = self.catalog.song_keys(genre)
             
     def submit_rating(self):
         genre = self.genre_var.get()
@@ -416,17 +568,7 @@ class MusicRecommender:
             
         try:
             # 평가 데이터 추가
-            song_id = self.song_id_mapping.get(song_info, len(self.ratings))
-            timestamp = datetime.now().timestamp()
-            
-            new_rating = pd.DataFrame({
-                'user_id': [self.current_user_id],
-                'song_id': [song_id],
-                'rating': [rating],
-                'timestamp': [timestamp]
-            })
-            
-            self.ratings = pd.concat([self.ratings, new_rating], ignore_index=True)
+            self.engine.add_rating(self.current_user_id, song_info, rating)
             
             # 평가 히스토리 저장
             self.save_rating_history(genre, song_info, rating)
@@ -448,7 +590,7 @@ class MusicRecommender:
             return
             
         method = self.rec_method_var.get()
-        if not method:
+        if method not in METHOD_KEYS:
             messagebox.showerror("오류", "추천 방식을 선택해주세요.")
             return
             
@@ -461,138 +603,73 @@ class MusicRecommender:
             
         logging.info(f"추천 작 - 방식: {method}, 곡 수: {rec_count}, 최소 평점: {min_rating}")
         
-        # 진행 태그 표시
-        progress = ttk.Progressbar(self.recommendation_tab, mode='indeterminate')
-        progress.pack(pady=5)
-        progress.start()
+        # 진행 표시 (클릭마다 새로 만들지 않고 하나를 재사용)
+        if self.rec_progress is None:
+            self.rec_progress = ttk.Progressbar(self.recommendation_tab, mode='indeterminate')
+        if not self.rec_progress.winfo_ismapped():
+            self.rec_progress.pack(pady=5)
+            self.rec_progress.start()
+        
+        user_id = self.current_user_id
         
         def recommend():
-            try:
-                recommendations = []
-                
-                if method == "협업 필터링" or method == "하이브리드":
-                    cf_recs = self.collaborative_filtering()
-                    recommendations.extend(cf_recs)
-                    
-                if method == "장르 기반" or method == "하이브리드":
-                    genre_recs = self.genre_based()
-                    recommendations.extend(genre_recs)
-                    
-                if method == "아티스트 기반" or method == "하이브리드":
-                    artist_recs = self.artist_based()
-                    recommendations.extend(artist_recs)
-                    
-                # 중복 제거 및 정렬
-                recommendations = list(set(recommendations))
-                recommendations = [r for r in recommendations if r[1] >= min_rating]
-                recommendations.sort(key=lambda x: x[1], reverse=True)
-                
-                # 결과 표시
-                self.rec_result.delete(1.0, tk.END)
-                self.rec_result.insert(tk.END, f"=== {method} 추천 결과 ===\n")
-                self.rec_result.insert(tk.END, f"최소 평점: {min_rating}점 이상\n\n")
-                
-                if not recommendations:
-                    self.rec_result.insert(tk.END, "조건에 맞는 추천 곡이 없습니다.\n")
-                    self.rec_result.insert(tk.END, "다른 설정으로 다시 시도해보세요.")
-                else:
-                    for i, (song, score) in enumerate(recommendations[:rec_count], 1):
-                        self.rec_result.insert(tk.END, f"{i}. 🎵 {song}\n")
-                        self.rec_result.insert(tk.END, f"   평점 예측: {score:.2f}점\n")
-                        self.rec_result.insert(tk.END, f"   추천 신뢰도: {'★' * int(score)}\n\n")
-                
-            except Exception as e:
-                logging.error(f"추천 중 오류 발생: {str(e)}")
-                self.rec_result.delete(1.0, tk.END)
-                self.rec_result.insert(tk.END, "추천 중 오류가 발생했습니다. 다시 시도해주세요.")
-            
-            finally:
-                progress.stop()
-                progress.destroy()
-                logging.info(f"{Fore.GREEN}추천 완료{Style.RESET_ALL}")
-            
-        threading.Thread(target=recommend).start()
+            # 백그라운드 스레드에서 실행: 계산만 하고 위젯은 건드리지 않는다
+            return profiling.profile_call(
+                f'recommend_{METHOD_KEYS[method]}',
+                self.engine.recommend_ids, user_id, METHOD_KEYS[method], rec_count, min_rating
+            )
         
-    def collaborative_filtering(self):
-        logging.info("협업 필터링 모델 학습 중...")
+        # 같은 설정의 요청은 합쳐지고, 대기 중이던 이전 요청은 취소된다
+        request_key = (user_id, method, rec_count, min_rating, len(self.ratings))
+        self.rec_request = (self.rec_worker.submit(request_key, recommend), method, min_rating)
+        self.poll_recommendations()
         
-        if len(self.ratings) < 5:
-            logging.warning("평가 데이터가 부족하여 협업 필터링을 수행할 수 없습니다.")
-            return []
-            
-        try:
-            # SVD 모델 학습
-            reader = Reader(rating_scale=(1, 5))
-            data = Dataset.load_from_df(self.ratings[['user_id', 'song_id', 'rating']], reader)
-            
-            trainset = data.build_full_trainset()
-            self.svd_model = SVD(n_factors=100, n_epochs=20, lr_all=0.005, reg_all=0.02)
-            self.svd_model.fit(trainset)
-            
-            # 추천 생성
-            recommendations = []
-            rated_songs = set(self.ratings[self.ratings['user_id'] == self.current_user_id]['song_id'])
-            
-            for song_key, song_id in self.song_id_mapping.items():
-                if song_id not in rated_songs:
-                    try:
-                        pred = self.svd_model.predict(self.current_user_id, song_id).est
-                        recommendations.append((song_key, pred))
-                    except Exception as e:
-                        logging.error(f"예측 중 오류 발생: {str(e)}")
-                        continue
+    def poll_recommendations(self):
+        # Tk 메인 스레드에서 작업 결과를 주기적으로 확인
+        if self.rec_polling:
+            return
+        
+        # 결과를 꺼내기 전에 상태를 확인해야 그 사이에 끝난 작업의 결과를 놓치지 않는다
+        busy = self.rec_worker.busy
+        for ticket, recommendations, error in self.rec_worker.poll():
+            request_ticket, method, min_rating = self.rec_request
+            if ticket == request_ticket:
+                self.show_recommendations(method, min_rating, recommendations, error)
+        
+        if busy:
+            self.rec_polling = True
             
-            return recommendations
+            def poll_again():
+                self.rec_polling = False
+                self.poll_recommendations()
+                
+            self.root.after(50, poll_again)
             
-        except Exception as e:
-            logging.error(f"협업 필터링 중 오류 발생: {str(e)}")
-            return []
+    def show_recommendations(self, method, min_rating, recommendations, error=None):
+        self.rec_progress.stop()
+        self.rec_progress.pack_forget()
+        self.rec_result.delete(1.0, tk.END)
+        
+        if error is not None:
+            logging.error(f"추천 중 오류 발생: {str(error)}")
+            self.rec_result.insert(tk.END, "추천 중 오류가 발생했습니다. 다시 시도해주세요.")
+            return
             
-    def genre_based(self):
-        logging.info("장르 기반 추천 계산 중...")
-        
-        # 장르별 평균 평점 계산
-        genre_ratings = {}
-        for genre in self.music_data:
-            genre_songs = [song['title'] for song in self.music_data[genre]]
-            ratings = [r for r in self.ratings['rating'] if r > 0]
-            if ratings:
-                genre_ratings[genre] = np.mean(ratings)
-                
-        # 추천 생성
-        recommendations = []
-        for genre, rating in genre_ratings.items():
-            for song in self.music_data[genre]:
-                song_info = f"{song['title']} - {song['artist']} ({song['genre']})"
-                recommendations.append((song_info, rating))
-                
-        return recommendations
-        
-    def artist_based(self):
-        logging.info("아티스트 기반 추천 계산 중...")
-        
-        # 아티스트별 평균 평점 계산
-        artist_ratings = {}
-        for genre in self.music_data:
-            for song in self.music_data[genre]:
-                artist = song['artist']
-                if artist not in artist_ratings:
-                    artist_ratings[artist] = []
-                ratings = [r for r in self.ratings['rating'] if r > 3]
-                artist_ratings[artist].extend(ratings)
-                
-        # 추천 생성
-        recommendations = []
-        for artist, ratings in artist_ratings.items():
-            if ratings:
-                avg_rating = np.mean(ratings)
-                for genre in self.music_data:
-                    for song in self.music_data[genre]:
-                        if song['artist'] == artist:
-                            song_info = f"{song['title']} - {artist} ({song['genre']})"
-                            recommendations.append((song_info, avg_rating))
-                            
-        return recommendations
+        # 결과 표시
+        self.rec_result.insert(tk.END, f"=== {method} 추천 결과 ===\n")
+        self.rec_result.insert(tk.END, f"최소 평점: {min_rating}점 이상\n\n")
+        
+        if not recommendations:
+            self.rec_result.insert(tk.END, "조건에 맞는 추천 곡이 없습니다.\n")
+            self.rec_result.insert(tk.END, "다른 설정으로 다시 시도해보세요.")
+        else:
+            for i, (song_id, score) in enumerate(recommendations, 1):
+                song = f"{self.catalog.song_key(song_id)} ({self.catalog.genre_of(song_id)})"
+                self.rec_result.insert(tk.END, f"{i}. 🎵 {song}\n")
+                self.rec_result.insert(tk.END, f"   평점 예측: {score:.2f}점\n")
+                self.rec_result.insert(tk.END, f"   추천 신뢰도: {'★' * int(score)}\n\n")
+        
+        logging.info(f"{Fore.GREEN}추천 완료{Style.RESET_ALL}")
         
     def save_rating_history(self, genre, song_info, rating):
         history = {
@@ -602,38 +679,43 @@ class MusicRecommender:
             'rating': rating
         }
         
-        try:
-            with open('rating_history.json', 'r') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            data = []
-            
-        data.append(history)
-        
-        with open('rating_history.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-    def load_rating_history(self):
-        try:
-            with open('rating_history.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        # 한 줄 추가만 수행 (전체 파일을 다시 쓰지 않음)
+        self.history_log.append(history)
+        self.stats.sync(self.history_log)
             
+    @metrics.timed('history_refresh')
     def refresh_history(self):
-        history = self.load_rating_history()
-        self.history_text.delete(1.0, tk.END)
+        # 새로 추가된 기록만 색인하고 필터/정렬 조건에 맞는 기록 번호만 다시 구한다
+        self.history_index.update()
+        self.history_genre_combo['values'] = ["전체"] + sorted(self.history_index.genre_names)
         
-        if not history:
-            self.history_text.insert(tk.END, "아직 평가 기록이 없습니다.")
+        genre = self.history_genre_var.get()
+        rating = self.history_rating_var.get()
+        try:
+            self.history_rows = self.history_index.query(
+                genre=None if genre == "전체" else genre,
+                rating=None if rating == "전체" else int(rating),
+                start_date=self.history_from_var.get().strip() or None,
+                end_date=self.history_to_var.get().strip() or None,
+                sort=HISTORY_SORT_KEYS[self.history_sort_var.get()]
+            )
+        except ValueError:
+            messagebox.showerror("오류", "기간은 YYYY-MM-DD 형식으로 입력해주세요.")
             return
-            
-        for entry in reversed(history):  # 최신 기록이 위에 오도록 역순으로 표시
+        
+        self.history_start = 0
+        self.render_history()
+        
+    @metrics.timed('history_render')
+    def render_history(self):
+        # 현재 위치의 한 화면 분량만 트리뷰에 만든다
+        total = len(self.history_rows)
+        start = self.history_start
+        rows = self.history_rows[start:start + HISTORY_PAGE_SIZE]
+        
+        self.history_tree.delete(*self.history_tree.get_children())
+        for entry in self.history_index.read_entries(rows):
             try:
-                # 시간 정보 표시
-                timestamp = entry.get('timestamp', '날짜 정보 없음')
-                self.history_text.insert(tk.END, f"🕒 {timestamp}\n")
-                
                 # 곡 정보 표시
                 if 'song_info' in entry:
                     song_info = entry['song_info']
@@ -641,52 +723,70 @@ class MusicRecommender:
                     song_info = f"{entry['track']} - {entry['artist']}"
                 else:
                     song_info = "곡 정보 없음"
-                self.history_text.insert(tk.END, f"🎵 {song_info}\n")
-                
-                # 장르 정보 표시
-                genre = entry.get('genre', '장르 정보 없음')
-                self.history_text.insert(tk.END, f"🎸 {genre}\n")
                 
                 # 평점 표시 (이모지로 시각화)
                 rating = int(entry.get('rating', 0))
-                stars = "⭐" * rating
-                self.history_text.insert(tk.END, f"평점: {stars} ({rating}점)\n")
-                
-                # 구분선 추가
-                self.history_text.insert(tk.END, "─" * 40 + "\n\n")
+                self.history_tree.insert("", tk.END, values=(
+                    entry.get('timestamp', '날짜 정보 없음'),
+                    song_info,
+                    entry.get('genre', '장르 정보 없음'),
+                    f"{'⭐' * rating} ({rating}점)"
+                ))
             except Exception as e:
                 logging.error(f"히스토리 항목 표시 중 오류 발생: {str(e)}")
                 continue
+        
+        if total:
+            self.history_scrollbar.set(start / total, min(start + HISTORY_PAGE_SIZE, total) / total)
+            self.history_status.config(
+                text=f"{total}건 중 {start + 1}-{min(start + HISTORY_PAGE_SIZE, total)}"
+            )
+        else:
+            self.history_scrollbar.set(0, 1)
+            self.history_status.config(text="아직 평가 기록이 없습니다." if not len(self.history_index)
+                                       else "조건에 맞는 기록이 없습니다.")
+        
+    def scroll_history(self, action, amount, unit=None):
+        # 스크롤바 명령: ("moveto", 비율) 또는 ("scroll", 줄/페이지 수, "units"/"pages")
+        total = len(self.history_rows)
+        if action == "moveto":
+            start = int(float(amount) * total)
+        else:
+            step = HISTORY_PAGE_SIZE if unit == "pages" else 1
+            start = self.history_start + int(amount) * step
+        start = max(0, min(start, total - HISTORY_PAGE_SIZE))
+        if start != self.history_start:
+            self.history_start = start
+            self.render_history()
+        
+    def on_history_wheel(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_history("scroll", -3, "units")
+        else:
+            self.scroll_history("scroll", 3, "units")
+        return "break"
             
+    @metrics.timed('stats_render')
+    @profiling.profiled('stats')
     def update_stats(self):
-        history = self.load_rating_history()
+        # 누적 통계에 새 기록만 반영하므로 기록 길이와 무관하게 일정한 비용
+        self.stats.sync(self.history_log)
+        summary = self.stats.summary()
         self.stats_text.delete(1.0, tk.END)
         
-        if not history:
+        if not summary['count']:
             self.stats_text.insert(tk.END, "통계를 계산하기 위한 데이터가 부족합니다.")
             return
             
-        # 기본 통계
-        total_ratings = len(history)
-        avg_rating = np.mean([entry['rating'] for entry in history])
-        
-        # 장르별 통계
-        genre_stats = {}
-        for entry in history:
-            genre = entry['genre']
-            if genre not in genre_stats:
-                genre_stats[genre] = []
-            genre_stats[genre].append(entry['rating'])
-            
         # 통계 표시
         self.stats_text.insert(tk.END, f"=== 전체 통계 ===\n")
-        self.stats_text.insert(tk.END, f"총 평가 수: {total_ratings}\n")
-        self.stats_text.insert(tk.END, f"평균 평점: {avg_rating:.2f}\n\n")
+        self.stats_text.insert(tk.END, f"총 평가 수: {summary['count']}\n")
+        self.stats_text.insert(tk.END, f"평균 평점: {summary['mean']:.2f}\n\n")
         
         self.stats_text.insert(tk.END, f"=== 장르별 통계 ===\n")
-        for genre, ratings in genre_stats.items():
-            avg = np.mean(ratings)
-            count = len(ratings)
+        for genre, genre_stats in self.stats.genre_stats().items():
+            avg = genre_stats['mean']
+            count = genre_stats['count']
             self.stats_text.insert(tk.END, f"{genre}:\n")
             self.stats_text.insert(tk.END, f"  평가 수: {count}\n")
             self.stats_text.insert(tk.END, f"  평균 평점: {avg:.2f}\n")
@@ -745,8 +845,8 @@ class MusicRecommender:
                 return
                 
             # 플레이리스트 추가
+            self.storage.create_playlist(name)
             self.playlist_listbox.insert(tk.END, name)
-            self.save_playlists()
             
             # 성공 메시지
             messagebox.showinfo(
@@ -805,9 +905,7 @@ class MusicRecommender:
         song_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # 모든 곡 추가
-        for genre in self.music_data:
-            for song in self.music_data[genre]:
-                song_list.insert(tk.END, f"{song['title']} - {song['artist']}")
+        song_list.insert(tk.END, *self.catalog.song_keys())
         
         def confirm_selection():
             selections = song_list.curselection()
@@ -849,72 +947,86 @@ class MusicRecommender:
         self.root.clipboard_append(share_text)
         messagebox.showinfo("공유", "플레이리스트가 클립보드에 복사되었습니다.")
 
+    @metrics.timed('trends_render')
+    @profiling.profiled('trends')
     def update_trends(self):
-        history = self.load_rating_history()
-        if not history:
+        import matplotlib.dates as mdates
+        
+        self.stats.sync(self.history_log)
+        if not self.stats.overall.count:
             messagebox.showwarning("경고", "트렌드를 분석할 데이터가 부족합니다.")
             return
             
-        # 차트 초기화
-        self.fig.clear()
-        ax1 = self.fig.add_subplot(121)
-        ax2 = self.fig.add_subplot(122)
-        
-        # 장르별 평균 평점
-        genre_ratings = {}
-        for entry in history:
-            genre = entry['genre']
-            if genre not in genre_ratings:
-                genre_ratings[genre] = []
-            genre_ratings[genre].append(entry['rating'])
-            
-        genres = list(genre_ratings.keys())
-        averages = [np.mean(ratings) for ratings in genre_ratings.values()]
-        
-        # 장르별 평균 평점 차트
-        bars = ax1.bar(genres, averages, color=self.style.COLORS['chart_colors'])
-        ax1.set_title('장르별 평균 평점', color=self.style.COLORS['text'])
-        ax1.set_ylabel('평균 평점', color=self.style.COLORS['text'])
-        ax1.tick_params(colors=self.style.COLORS['text'])
-        
-        # 평가 추이
-        timestamps = [datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S') for entry in history]
-        ratings = [entry['rating'] for entry in history]
-        
-        ax2.plot(timestamps, ratings, 'o-', color=self.style.COLORS['accent'])
-        ax2.set_title('평가 추이', color=self.style.COLORS['text'])
-        ax2.set_ylabel('평점', color=self.style.COLORS['text'])
-        ax2.tick_params(colors=self.style.COLORS['text'])
+        # 축 눈금이 바뀔 때만 전체를 다시 그리고, 그 외에는 바뀐 요소만 블리팅
+        full_redraw = self.trend_background is None
+        
+        # 장르별 평균 평점 (장르 구성이 같으면 막대 높이만 바꾼다)
+        genre_stats = self.stats.genre_stats()
+        genres = list(genre_stats.keys())
+        averages = [stats['mean'] for stats in genre_stats.values()]
+        if genres != self.genre_names:
+            if self.genre_bars is not None:
+                self.genre_bars.remove()
+            self.genre_bars = self.genre_ax.bar(
+                genres, averages, color=self.style.COLORS['chart_colors'], animated=True
+            )
+            self.genre_names = genres
+            full_redraw = True
+        else:
+            for bar, average in zip(self.genre_bars, averages):
+                bar.set_height(average)
+        
+        # 평가 추이 (기록 길이와 무관하게 최대 MAX_TREND_POINTS개의 구간 평균만 그린다)
+        bucket, timestamps, ratings = self.stats.trend_points()
+        if not timestamps:
+            # 시각을 읽을 수 있는 기록이 없으면 추이 선만 지우고 장르별 막대는 그대로 그린다
+            self.trend_line.set_data([], [])
+            self.redraw_trends(full_redraw)
+            return
+        x = mdates.date2num(timestamps)
+        self.trend_line.set_data(x, ratings)
+        
+        low, high = self.trend_ax.get_xlim()
+        if bucket != self.trend_bucket or x[0] < low or x[-1] > high:
+            # 새 점이 들어올 여유를 오른쪽에 두어 축 범위 변경(전체 다시 그리기)을 줄인다
+            width = TREND_BUCKET_DAYS[bucket]
+            span = max(x[-1] - x[0], width)
+            self.trend_ax.set_xlim(x[0] - width / 2, x[-1] + span * 0.1 + width / 2)
+            self.trend_ax.set_title(
+                f'평가 추이 ({TREND_BUCKET_LABELS[bucket]})', color=self.style.COLORS['text']
+            )
+            self.trend_bucket = bucket
+            full_redraw = True
         
-        self.fig.tight_layout()
-        self.fig.canvas.draw()
-
-    def save_playlists(self):
-        playlists = list(self.playlist_listbox.get(0, tk.END))
-        with open('playlists.json', 'w', encoding='utf-8') as f:
-            json.dump(playlists, f, ensure_ascii=False, indent=2)
+        self.redraw_trends(full_redraw)
+    
+    def redraw_trends(self, full_redraw):
+        if full_redraw:
+            self.trend_canvas.draw()
+        else:
+            self.trend_canvas.restore_region(self.trend_background)
+            self.draw_trend_artists()
+            self.trend_canvas.blit(self.fig.bbox)
+    
+    def on_trends_draw(self, event):
+        # 전체 다시 그리기(창 크기 변경 포함) 직후 배경을 새로 저장하고 변하는 요소를 그 위에 그린다
+        self.trend_background = self.trend_canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_trend_artists()
+    
+    def draw_trend_artists(self):
+        for bar in self.genre_bars or []:
+            self.genre_ax.draw_artist(bar)
+        self.trend_ax.draw_artist(self.trend_line)
 
     def load_playlists(self):
-        try:
-            with open('playlists.json', 'r', encoding='utf-8') as f:
-                playlists = json.load(f)
-                for playlist in playlists:
-                    self.playlist_listbox.insert(tk.END, playlist)
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
+        for playlist in self.storage.playlists():
+            self.playlist_listbox.insert(tk.END, playlist)
 
     def save_playlist_songs(self, playlist_name, songs):
-        filename = f'playlist_{playlist_name}.json'
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(songs, f, ensure_ascii=False, indent=2)
+        self.storage.set_playlist_songs(playlist_name, songs)
 
     def load_playlist_songs(self, playlist_name):
-        try:
-            filename = f'playlist_{playlist_name}.json'
-            with open(filename, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return self.storage.playlist_songs(playlist_name)
 
     def show_welcome_message(self):
         messagebox.showinfo(
@@ -930,7 +1042,18 @@ class MusicRecommender:
 
     def run(self):
         logging.info(f"{Fore.CYAN}Music Recommender Pro 시작{Style.RESET_ALL}")
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # 워밍업이나 SVD 재학습이 아직 돌고 있으면 학습 중인 행렬을 저장하지 않는다
+            worker_stopped = self.rec_worker.close(timeout=5)
+            self.history_log.close()
+            self.stats.save()
+            self.storage.close()
+            if worker_stopped:
+                self.engine.save_model()
+            else:
+                logging.warning("추천 작업이 끝나지 않아 SVD 모델을 저장하지 않았습니다. 다음 실행 때 다시 학습합니다.")
 
     def delete_playlist(self):
         selection = self.playlist_listbox.curselection()
@@ -940,25 +1063,31 @@ class MusicRecommender:
             
         playlist_name = self.playlist_listbox.get(selection[0])
         if messagebox.askyesno("확인", f"'{playlist_name}' 플레이리스트를 삭제하시겠습니까?"):
-            # 플레이리스트 파일 삭제
-            try:
-                os.remove(f'playlist_{playlist_name}.json')
-            except:
-                pass
-                
+            # 플레이리스트와 곡 목록 삭제
+            self.storage.delete_playlist(playlist_name)
+            
             # 리스트에서 제거
             self.playlist_listbox.delete(selection[0])
-            self.save_playlists()
             messagebox.showinfo("성공", f"'{playlist_name}' 플레이리스트가 삭제되었습니다.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Music Recommender Pro")
+    parser.add_argument('--catalog', help="곡 카탈로그 파일 (CSV, Parquet, JSONL, JSON)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="모듈 불러오기와 초기화 단계별 소요 시간을 기록")
+    parser.add_argument('--profile-dir',
+                        help="추천/통계/트렌드 요청마다 cProfile과 tracemalloc 결과를 기록할 디렉터리")
+    args = parser.parse_args()
+    if args.profile_dir:
+        profiling.configure(args.profile_dir)
+    
     print(f"{Fore.CYAN}=== Music Recommender Pro 초기화 중... ==={Style.RESET_ALL}")
     print(f"{Fore.GREEN}Version: 3.0.0{Style.RESET_ALL}")
     print(f"{Fore.YELLOW}개발자: faya{Style.RESET_ALL}")
     print("-" * 50)
     
     try:
-        app = MusicRecommender()
+        app = MusicRecommender(args.catalog, args.profile_startup)
         app.run()
     except Exception as e:
         logging.error(f"{Fore.RED}오류 발생: {str(e)}{Style.RESET_ALL}")
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Music Recommender Pro의 GUI 독립 추천 엔진"""
+from .ann import IVFIndex, recall_report
+from .cache import ResultCache
+from .catalog import DEFAULT_MUSIC_DATA, MusicCatalog, load_catalog
+from .engine import METHODS, NotEnoughRatingsError, RecommenderEngine
+from .hybrid import DEFAULT_HYBRID_WEIGHTS, HybridRanker
+from .item_similarity import ItemNeighborIndex, ItemSimilarityRecommender
+from .ratings import RatingsStore, load_ratings
+from .recommenders import (
+    DEFAULT_SVD_PARAMS,
+    MIN_RATINGS,
+    ArtistRecommender,
+    CollaborativeFilteringRecommender,
+    GenreRecommender,
+    GroupPreferenceRecommender,
+)
+from .svd import IncrementalSVD, ModelFormatError
+
+__all__ = [
+    'DEFAULT_HYBRID_WEIGHTS',
+    'DEFAULT_MUSIC_DATA',
+    'DEFAULT_SVD_PARAMS',
+    'MIN_RATINGS',
+    'METHODS',
+    'ModelFormatError',
+    'ArtistRecommender',
+    'CollaborativeFilteringRecommender',
+    'GenreRecommender',
+    'GroupPreferenceRecommender',
+    'HybridRanker',
+    'IVFIndex',
+    'IncrementalSVD',
+    'ItemNeighborIndex',
+    'ItemSimilarityRecommender',
+    'MusicCatalog',
+    'NotEnoughRatingsError',
+    'RatingsStore',
+    'RecommenderEngine',
+    'ResultCache',
+    'load_catalog',
+    'load_ratings',
+    'recall_report',
+]
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""합성 데이터로 추천 파이프라인의 속도와 메모리를 측정한다
+
+    python -m music_engine.benchmark --scales 1000 100000 1000000 --output benchmark.json
+
+결과는 규모별 단계마다 처리량, p50/p99 지연 시간(ms), 최대 메모리(MB)를 담은 JSON이다.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .catalog import MusicCatalog
+from .engine import RecommenderEngine
+from .history import RatingHistoryLog
+from .ratings import RatingsStore
+from .stats import RatingStatsAggregator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+
+
+def synthetic_catalog(n_songs, n_artists=None, n_genres=12, random_state=0):
+    """무작위 장르/아티스트를 가진 합성 카탈로그 (아티스트는 한 장르에만 속한다)"""
+    rng = np.random.default_rng(random_state)
+    if n_artists is None:
+        n_artists = max(1, n_songs // 10)
+    artist_genres = rng.integers(0, n_genres, n_artists)
+    artists = rng.integers(0, n_artists, n_songs)
+    frame = pd.DataFrame({
+        'title': [f"Song {i}" for i in range(n_songs)],
+        'artist': [f"Artist {a}" for a in artists],
+        'genre': [f"Genre {g}" for g in artist_genres[artists]],
+    })
+    return MusicCatalog.from_frame(frame)
+
+
+def synthetic_ratings(catalog, n_ratings, n_users=None, n_factors=8, rating_scale=(1, 5),
+                      popularity=1.1, random_state=0):
+    """잠재 요인 모델에서 뽑은 합성 평가 (곡 인기도는 지프 분포, 평점은 정수로 반올림)
+
+    사용자/곡 요인의 내적에 장르 편향과 잡음을 더하므로 협업 필터링이 배울 구조가 있다.
+    """
+    rng = np.random.default_rng(random_state)
+    n_songs = len(catalog)
+    if n_users is None:
+        n_users = max(1, n_ratings // 20)
+
+    user_factors = rng.normal(0, 0.5, (n_users, n_factors))
+    song_factors = rng.normal(0, 0.5, (n_songs, n_factors))
+    genre_bias = rng.normal(0, 0.5, len(catalog.genre_names))
+
+    ranks = np.arange(1, n_songs + 1, dtype=np.float64)
+    weights = ranks ** -popularity
+    song_order = rng.permutation(n_songs)
+
+    ratings = RatingsStore(capacity=max(n_ratings, 1))
+    chunk = 1_000_000
+    timestamp = datetime.now().timestamp() - n_ratings
+    for start in range(0, n_ratings, chunk):
+        count = min(chunk, n_ratings - start)
+        users = rng.integers(0, n_users, count)
+        songs = song_order[rng.choice(n_songs, count, p=weights / weights.sum())]
+        low, high = rating_scale
+        raw = (
+            (low + high) / 2
+            + np.einsum('ij,ij->i', user_factors[users], song_factors[songs])
+            + genre_bias[catalog.genre_codes[songs]]
+            + rng.normal(0, 0.5, count)
+        )
+        values = np.clip(np.rint(raw), low, high)
+        timestamps = timestamp + start + np.arange(count, dtype=np.float64)
+        ratings.extend(users, songs, values, timestamps)
+    return ratings
+
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000) if len(samples) else None
+
+
+def measure(func, calls=None, units=1):
+    """func를 실행해 처리량, 지연 시간, 최대 메모리를 잰다
+
+    calls가 없으면 func()를 한 번 실행하고 units를 처리한 것으로 본다.
+    calls가 있으면 인자마다 func(arg)를 호출하며, 첫 호출만 메모리 추적 아래 실행하고
+    (추적 비용이 지연 시간에 섞이지 않도록) 나머지 호출로 지연 시간 분포를 구한다.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        func(*(() if calls is None else calls[:1]))
+        first = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {'peak_mb': peak / 2 ** 20}
+    if calls is None:
+        result.update({'seconds': first, 'throughput': units / first if first else None})
+        return result
+
+    samples = []
+    for arg in calls[1:]:
+        started = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - started)
+    total = sum(samples)
+    result.update({
+        'calls': len(samples),
+        'first_ms': first * 1000,
+        'throughput': len(samples) / total if total else None,
+        'p50_ms': _percentile_ms(samples, 50),
+        'p99_ms': _percentile_ms(samples, 99),
+    })
+    return result
+
+
+def _history_entries(catalog, ratings, count):
+    for n in range(count):
+        song_id = int(ratings.song_ids[n])
+        yield {
+            'timestamp': datetime.fromtimestamp(float(ratings.timestamps[n])).strftime('%Y-%m-%d %H:%M:%S'),
+            'genre': catalog.genre_of(song_id),
+            'song_info': catalog.song_key(song_id),
+            'rating': int(ratings.values[n]),
+        }
+
+
+def _refresh_stats(stats, log):
+    # 통계/트렌드 탭을 갱신할 때와 같은 경로: 새 기록 반영 후 장르별 통계와 추이 차트 점
+    stats.sync(log)
+    return stats.genre_stats(), stats.trend_points()
+
+
+def run_scale(n_ratings, n_queries=200, history_limit=100000, svd_params=None, random_state=0):
+    """한 규모에서 모든 단계를 측정한다"""
+    n_songs = max(100, n_ratings // 50)
+    catalog = synthetic_catalog(n_songs, random_state=random_state)
+    ratings = synthetic_ratings(catalog, n_ratings, random_state=random_state)
+    n_users = int(ratings.user_ids.max()) + 1 if len(ratings) else 0
+    logger.info(f"벤치마크: 평가 {n_ratings}개, 사용자 {n_users}명, 곡 {n_songs}곡")
+
+    # 새로 추가될 평가 1%는 점진 갱신 측정에 쓰기 위해 처음에는 숨겨 둔다
+    n_initial = n_ratings - max(1, n_ratings // 100)
+    initial = RatingsStore(capacity=n_ratings)
+    initial.extend(*(ratings.column(name)[:n_initial]
+                     for name in ('user_id', 'song_id', 'rating', 'timestamp')))
+    engine = RecommenderEngine(catalog, initial, svd_params, cache_size=0)
+    cf = engine.recommenders['cf']
+
+    rng = np.random.default_rng(random_state)
+    users = rng.choice(n_users, min(n_queries, n_users), replace=False).tolist()
+
+    stages = {}
+    stages['svd_fit'] = measure(cf.update, units=n_initial)
+    new_rows = [ratings.column(name)[n_initial:] for name in ('user_id', 'song_id', 'rating', 'timestamp')]
+    initial.extend(*new_rows)
+    stages['svd_partial_fit'] = measure(cf.update, units=n_ratings - n_initial)
+    stages['cf_recommend'] = measure(lambda u: cf.recommend(u, 10), users)
+    stages['cf_recommend_many'] = measure(lambda: cf.recommend_many(users, 10), units=len(users))
+    for method in ('genre', 'artist', 'item', 'hybrid'):
+        stages[f'{method}_recommend'] = measure(
+            lambda u, method=method: engine.recommend_ids(u, method, 10), users
+        )
+
+    # 평가 기록 I/O와 통계 (기록 건수는 history_limit까지만)
+    n_history = min(n_ratings, history_limit)
+    history_dir = tempfile.mkdtemp(prefix='music-benchmark-')
+    try:
+        path = os.path.join(history_dir, 'rating_history.jsonl')
+        entries = list(_history_entries(catalog, ratings, n_history))
+        log = RatingHistoryLog(path)
+
+        def append_all():
+            for entry in entries:
+                log.append(entry)
+            log.close()
+
+        stages['history_append'] = measure(append_all, units=n_history)
+        stages['history_read'] = measure(lambda: RatingHistoryLog(path).entries(), units=n_history)
+
+        # 처음 실행할 때처럼 전체 기록을 집계한 뒤, 기록 1%가 추가되었을 때의 갱신 비용
+        log = RatingHistoryLog(path)
+        stats = RatingStatsAggregator(os.path.join(history_dir, 'rating_stats.json'), catalog)
+        stages['stats'] = measure(lambda: _refresh_stats(stats, log), units=n_history)
+        n_new = max(1, n_history // 100)
+        for entry in entries[:n_new]:
+            log.append(entry)
+        stages['stats_incremental'] = measure(lambda: _refresh_stats(stats, log), units=n_new)
+        log.close()
+    finally:
+        shutil.rmtree(history_dir, ignore_errors=True)
+
+    return {
+        'n_ratings': n_ratings,
+        'n_users': n_users,
+        'n_songs': n_songs,
+        'n_history': n_history,
+        'stages': stages,
+    }
+
+
+def run_benchmark(scales=DEFAULT_SCALES, n_queries=200, history_limit=100000, svd_params=None,
+                  random_state=0):
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'n_queries': n_queries,
+            'svd_params': svd_params or {},
+        },
+        'scales': [
+            run_scale(n_ratings, n_queries, history_limit, svd_params, random_state)
+            for n_ratings in scales
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 데이터 추천 파이프라인 벤치마크")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="평가 수 (여러 개 지정 가능)")
+    parser.add_argument('--queries', type=int, default=200, help="지연 시간을 잴 사용자 수")
+    parser.add_argument('--history-limit', type=int, default=100000,
+                        help="평가 기록 I/O 측정에 쓸 최대 기록 수")
+    parser.add_argument('--n-factors', type=int, help="SVD 잠재 요인 수")
+    parser.add_argument('--n-epochs', type=int, help="SVD 학습 epoch 수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="결과 JSON 파일 (없으면 표준 출력)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger.setLevel(logging.INFO)
+
+    svd_params = {}
+    if args.n_factors is not None:
+        svd_params['n_factors'] = args.n_factors
+    if args.n_epochs is not None:
+        svd_params['n_epochs'] = args.n_epochs
+
+    report = run_benchmark(args.scales, args.queries, args.history_limit, svd_params, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 장르별 기본 음악 데이터
+DEFAULT_MUSIC_DATA = {
+    "K-POP": [
+        {"title": "Dynamite", "artist": "BTS", "genre": "K-POP"},
+        {"title": "How You Like That", "artist": "BLACKPINK", "genre": "K-POP"},
+        {"title": "Ditto", "artist": "NewJeans", "genre": "K-POP"},
+        {"title": "Love Dive", "artist": "IVE", "genre": "K-POP"},
+        {"title": "After LIKE", "artist": "IVE", "genre": "K-POP"}
+    ],
+    "POP": [
+        {"title": "Shape of You", "artist": "Ed Sheeran", "genre": "POP"},
+        {"title": "Anti-Hero", "artist": "Taylor Swift", "genre": "POP"},
+        {"title": "Starboy", "artist": "The Weeknd", "genre": "POP"},
+        {"title": "As It Was", "artist": "Harry Styles", "genre": "POP"},
+        {"title": "Blinding Lights", "artist": "The Weeknd", "genre": "POP"}
+    ],
+    "Rock": [
+        {"title": "Believer", "artist": "Imagine Dragons", "genre": "Rock"},
+        {"title": "Bohemian Rhapsody", "artist": "Queen", "genre": "Rock"},
+        {"title": "Do I Wanna Know?", "artist": "Arctic Monkeys", "genre": "Rock"},
+        {"title": "Thunder", "artist": "Imagine Dragons", "genre": "Rock"},
+        {"title": "We Will Rock You", "artist": "Queen", "genre": "Rock"}
+    ],
+    "Hip-Hop": [
+        {"title": "God's Plan", "artist": "Drake", "genre": "Hip-Hop"},
+        {"title": "HUMBLE.", "artist": "Kendrick Lamar", "genre": "Hip-Hop"},
+        {"title": "SICKO MODE", "artist": "Travis Scott", "genre": "Hip-Hop"},
+        {"title": "Hotline Bling", "artist": "Drake", "genre": "Hip-Hop"},
+        {"title": "goosebumps", "artist": "Travis Scott", "genre": "Hip-Hop"}
+    ],
+    "R&B": [
+        {"title": "Kill Bill", "artist": "SZA", "genre": "R&B"},
+        {"title": "Pink + White", "artist": "Frank Ocean", "genre": "R&B"},
+        {"title": "Best Part", "artist": "Daniel Caesar", "genre": "R&B"},
+        {"title": "Good Days", "artist": "SZA", "genre": "R&B"},
+        {"title": "Get You", "artist": "Daniel Caesar", "genre": "R&B"}
+    ]
+}
+
+
+def song_key(song):
+    return f"{song['title']} - {song['artist']}"
+
+
+def _encode(values):
+    # 등장 순서대로 정수 코드 부여
+    codes, names = pd.factorize(pd.Series(values), sort=False)
+    return codes.astype(np.int32), list(names)
+
+
+def _inverted_index(codes, n_groups):
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=n_groups))[:-1]
+    return np.split(order, bounds)
+
+
+class MusicCatalog:
+    """열 단위로 저장된 곡 카탈로그
+
+    곡 ID는 0부터 시작하는 연속 정수이며, 장르와 아티스트는 정수 코드로 저장한다.
+    "제목 - 아티스트" 문자열은 필요한 곡에 대해서만 만들고,
+    문자열 -> ID 색인은 처음 조회할 때 한 번만 만든다.
+    """
+
+    COLUMNS = ['title', 'artist', 'genre']
+
+    def __init__(self, music_data=None):
+        if music_data is None:
+            music_data = DEFAULT_MUSIC_DATA
+        titles, artists, genres = [], [], []
+        for genre in music_data:
+            for song in music_data[genre]:
+                titles.append(song['title'])
+                artists.append(song['artist'])
+                genres.append(song.get('genre', genre))
+        self._build(titles, artists, genres)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """title, artist, genre 열을 가진 DataFrame으로 카탈로그를 만든다 (song_id 열이 있으면 그 순서를 따름)"""
+        missing = [column for column in cls.COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"카탈로그에 필요한 열이 없습니다: {', '.join(missing)}")
+        if 'song_id' in frame.columns:
+            frame = frame.sort_values('song_id', kind='stable')
+            if not np.array_equal(frame['song_id'].to_numpy(), np.arange(len(frame))):
+                raise ValueError("song_id는 0부터 시작하는 연속된 정수여야 합니다.")
+
+        catalog = cls.__new__(cls)
+        catalog._build(frame['title'], frame['artist'], frame['genre'])
+        return catalog
+
+    def _build(self, titles, artists, genres):
+        logger.info("음악 데이터베이스 초기화 중...")
+        self.titles = np.asarray(titles, dtype=object)
+        self.song_ids = np.arange(len(self.titles), dtype=np.int64)
+
+        # 곡 ID -> 장르/아티스트 코드, 장르/아티스트 -> 곡 ID 역색인
+        self.genre_codes, self.genre_names = _encode(genres)
+        self.artist_codes, self.artist_names = _encode(artists)
+        self.genre_songs = _inverted_index(self.genre_codes, len(self.genre_names))
+        self.artist_songs = _inverted_index(self.artist_codes, len(self.artist_names))
+        self._genre_index = {genre: code for code, genre in enumerate(self.genre_names)}
+        self._key_index = None
+        self._music_data = None
+
+        logger.info(f"데이터베이스 초기화 완료 (곡 {len(self.titles)}개, 장르 {len(self.genre_names)}개)")
+
+    @property
+    def genres(self):
+        return list(self.genre_names)
+
+    def artist_of(self, song_id):
+        return self.artist_names[self.artist_codes[song_id]]
+
+    def genre_of(self, song_id):
+        return self.genre_names[self.genre_codes[song_id]]
+
+    def song(self, song_id):
+        return {
+            'title': self.titles[song_id],
+            'artist': self.artist_of(song_id),
+            'genre': self.genre_of(song_id)
+        }
+
+    def genre_song_ids(self, genre):
+        code = self._genre_index.get(genre)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.genre_songs[code]
+
+    def songs_in_genre(self, genre):
+        return [self.song(song_id) for song_id in self.genre_song_ids(genre)]
+
+    def song_keys(self, genre=None):
+        song_ids = self.song_ids if genre is None else self.genre_song_ids(genre)
+        return [self.song_key(song_id) for song_id in song_ids]
+
+    def song_key(self, song_id):
+        return f"{self.titles[song_id]} - {self.artist_of(song_id)}"
+
+    @property
+    def song_id_mapping(self):
+        """"제목 - 아티스트" -> 곡 ID 색인 (처음 접근할 때 생성)"""
+        if self._key_index is None:
+            self._key_index = {
+                self.song_key(song_id): int(song_id) for song_id in self.song_ids
+            }
+        return self._key_index
+
+    def song_id(self, key, default=None):
+        return self.song_id_mapping.get(key, default)
+
+    @property
+    def music_data(self):
+        """장르별 곡 목록 형태의 카탈로그 (이전 코드와의 호환용, 처음 접근할 때 생성)"""
+        if self._music_data is None:
+            self._music_data = {genre: self.songs_in_genre(genre) for genre in self.genre_names}
+        return self._music_data
+
+    def __len__(self):
+        return len(self.titles)
+
+
+def load_catalog(path):
+    """CSV, Parquet, JSON Lines 또는 장르별 JSON 파일에서 카탈로그를 읽는다"""
+    ext = os.path.splitext(path)[1].lower()
+    categorical = {'artist': 'category', 'genre': 'category'}
+    logger.info(f"카탈로그 파일 읽는 중: {path}")
+
+    if ext == '.csv':
+        frame = pd.read_csv(path, dtype=dict(categorical, title=str))
+    elif ext in ('.parquet', '.pq'):
+        frame = pd.read_parquet(path)
+    elif ext in ('.jsonl', '.ndjson'):
+        frame = pd.read_json(path, lines=True, dtype=False)
+    elif ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            return MusicCatalog(json.load(f))
+    else:
+        raise ValueError(f"지원하지 않는 카탈로그 형식입니다: {ext}")
+
+    return MusicCatalog.from_frame(frame)
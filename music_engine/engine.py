@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import datetime
+
+from . import metrics
+from .batch import recommend_in_pool
+from .cache import ResultCache
+from .catalog import MusicCatalog
+from .hybrid import HybridRanker
+from .item_similarity import ItemSimilarityRecommender
+from .ratings import RatingsStore
+from .recommenders import (
+    MIN_RATINGS,
+    ArtistRecommender,
+    CollaborativeFilteringRecommender,
+    GenreRecommender,
+)
+
+logger = logging.getLogger(__name__)
+
+# 추천 방식 이름과 사용할 추천기 목록
+METHODS = {
+    'cf': ('cf',),
+    'genre': ('genre',),
+    'artist': ('artist',),
+    'item': ('item',),
+    'hybrid': ('cf', 'genre', 'artist'),
+}
+
+
+class NotEnoughRatingsError(ValueError):
+    pass
+
+
+class RecommenderEngine:
+    """GUI 없이 사용할 수 있는 추천 엔진
+
+    storage(SQLiteStorage)를 주면 ratings가 없을 때 저장된 평가를 한 번에 읽어 시작하고,
+    add_rating으로 추가한 평가도 저장소에 기록한다.
+    """
+
+    def __init__(self, catalog=None, ratings=None, svd_params=None, drift_threshold=0.2,
+                 model_path=None, cache_size=1024, cache_ttl=300.0, hybrid_weights=None,
+                 candidate_factor=3, ann_params=None, storage=None, candidate_pool=100):
+        self.model_path = model_path
+        self.cache = ResultCache(cache_size, cache_ttl)
+        self.user_versions = {}
+        self.catalog = catalog if catalog is not None else MusicCatalog()
+        self.storage = storage
+        if ratings is None:
+            ratings = storage.load_ratings_store() if storage is not None else RatingsStore()
+        self.ratings = ratings
+        self.recommenders = {
+            'cf': CollaborativeFilteringRecommender(
+                self.catalog, self.ratings, svd_params, drift_threshold, ann_params
+            ),
+            'genre': GenreRecommender(self.catalog, self.ratings),
+            'artist': ArtistRecommender(self.catalog, self.ratings),
+            'item': ItemSimilarityRecommender(self.catalog, self.ratings),
+        }
+        self.ranker = HybridRanker(hybrid_weights)
+        self.candidate_factor = candidate_factor
+        self.candidate_pool = candidate_pool
+
+    def warm_start(self):
+        """저장된 SVD 모델이 현재 평가 데이터로 학습된 것이면 재학습 없이 불러온다"""
+        if self.model_path is None:
+            return False
+        return self.recommenders['cf'].load_model(self.model_path)
+
+    def save_model(self):
+        if self.model_path is None:
+            return False
+        return self.recommenders['cf'].save_model(self.model_path)
+
+    def add_rating(self, user_id, song_key, rating, timestamp=None):
+        song_id = self.catalog.song_id(song_key, len(self.ratings))
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        self.ratings.add(user_id, song_id, rating, timestamp)
+        if self.storage is not None:
+            self.storage.add_rating(user_id, song_id, rating, timestamp)
+        metrics.inc('ratings_ingested')
+        self.invalidate(user_id)
+        return song_id
+
+    def recommend(self, user_id, method='hybrid', k=5, min_rating=0):
+        """추천 결과 [("제목 - 아티스트", 점수)]"""
+        return self.format(self.recommend_ids(user_id, method, k, min_rating))
+
+    def recommend_ids(self, user_id, method='hybrid', k=5, min_rating=0):
+        """추천 결과 [(곡 ID, 점수)]"""
+        self._check_request(method)
+        cache_key = (user_id, method, k, min_rating, self.user_versions.get(user_id, 0))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            metrics.inc('cache_hits')
+            return list(cached)
+        metrics.inc('cache_misses')
+
+        with metrics.timer(f'recommend_{method}'):
+            names = METHODS[method]
+            n_candidates = self._candidate_count(names, k)
+            candidates = {
+                name: self.recommenders[name].recommend(user_id, n_candidates) for name in names
+            }
+            recommendations = self.ranker.rank(candidates, k, min_rating)
+        self.cache.put(cache_key, tuple(recommendations))
+        return recommendations
+
+    def format(self, recommendations):
+        return [(self.catalog.song_key(song_id), score) for song_id, score in recommendations]
+
+    def _check_request(self, method):
+        if method not in METHODS:
+            raise ValueError(f"알 수 없는 추천 방식: {method}")
+        if len(self.ratings) < MIN_RATINGS:
+            raise NotEnoughRatingsError(
+                f"추천을 받으려면 최소 {MIN_RATINGS}개 이상의 곡을 평가해야 합니다."
+            )
+
+    def _candidate_count(self, names, k):
+        # 하이브리드는 방식별 상위 k개만 합치면 다른 방식에서 점수를 보탤 곡이 빠지므로 넉넉히 받는다.
+        # 후보 수가 k에 따라 달라지면 k=3 결과가 k=5 결과의 앞부분과 달라지므로, k * candidate_factor가
+        # candidate_pool을 넘지 않는 한 같은 후보 풀에서 순위를 매긴다
+        return max(self.candidate_pool, k * self.candidate_factor) if len(names) > 1 else k
+
+    def invalidate(self, user_id=None):
+        """평가가 바뀐 사용자의 캐시된 추천 결과를 무효화한다 (user_id가 없으면 전체)
+
+        add_rating은 자동으로 호출하므로, ratings를 직접 고친 경우에만 호출하면 된다.
+        """
+        if user_id is None:
+            self.user_versions.clear()
+            self.cache.clear()
+            return
+        self.user_versions[user_id] = self.user_versions.get(user_id, 0) + 1
+        self.cache.invalidate_user(user_id)
+
+    def recommend_many(self, user_ids, k=5, method='hybrid', min_rating=0, n_jobs=None,
+                       block_size=1024):
+        """여러 사용자의 추천 결과를 한 번에 계산한다 ({user_id: [("제목 - 아티스트", 점수)]})
+
+        협업 필터링은 사용자 블록 단위 행렬 곱으로 계산하고, 장르/아티스트 기반은 n_jobs를 주거나
+        사용자가 batch.POOL_MIN_USERS명 이상일 때만 프로세스 풀로 나눠 계산한다.
+        """
+        results = self.recommend_many_ids(user_ids, k, method, min_rating, n_jobs, block_size)
+        return {user_id: self.format(recommendations) for user_id, recommendations in results.items()}
+
+    def recommend_many_ids(self, user_ids, k=5, method='hybrid', min_rating=0, n_jobs=None,
+                           block_size=1024):
+        """여러 사용자의 추천 결과 {user_id: [(곡 ID, 점수)]}"""
+        self._check_request(method)
+        user_ids = list(dict.fromkeys(user_ids))
+        names = METHODS[method]
+        n_candidates = self._candidate_count(names, k)
+        per_method = recommend_in_pool(
+            self.catalog, self.ratings, names, user_ids, n_candidates, n_jobs
+        )
+        if 'cf' in names:
+            per_method['cf'] = self.recommenders['cf'].recommend_many(
+                user_ids, n_candidates, block_size
+            )
+        if 'item' in names:
+            # 사용자마다 평가한 곡의 이웃만 조회하므로 사용자별로 바로 계산한다
+            per_method['item'] = [
+                self.recommenders['item'].recommend(user_id, n_candidates) for user_id in user_ids
+            ]
+
+        return {
+            user_id: self.ranker.rank({name: per_method[name][n] for name in names}, k, min_rating)
+            for n, user_id in enumerate(user_ids)
+        }
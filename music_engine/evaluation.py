@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""저장된 평가 데이터로 추천기를 오프라인 평가한다
+
+    python -m music_engine.evaluation --ratings ratings.parquet --folds 5 --split time --n-jobs 4
+
+협업 필터링은 RMSE/MAE를, 모든 추천 방식은 precision@k, recall@k, NDCG@k와 카탈로그 커버리지를 잰다.
+"""
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from .catalog import MusicCatalog, load_catalog
+from .engine import METHODS, RecommenderEngine
+from .history import DEFAULT_LOG_PATH, RatingHistoryLog, ratings_from_history
+from .ratings import RatingsStore, load_ratings
+
+logger = logging.getLogger(__name__)
+
+SPLITS = ('random', 'time')
+RANKING_METRICS = ('precision', 'recall', 'ndcg', 'coverage')
+
+
+def kfold_splits(n_ratings, n_folds=5, random_state=0):
+    """무작위 k-겹 분할 [(학습 행 번호, 평가 행 번호)]"""
+    order = np.random.default_rng(random_state).permutation(n_ratings)
+    folds = np.array_split(order, n_folds)
+    return [
+        (np.sort(np.concatenate(folds[:f] + folds[f + 1:])), np.sort(folds[f]))
+        for f in range(n_folds)
+    ]
+
+
+def time_splits(timestamps, n_folds=5):
+    """시간 순 확장 창 분할: 시간순으로 n_folds + 1 구간으로 나눠 f번째 분할은 앞의 f + 1개 구간으로
+    학습하고 바로 다음 구간으로 평가한다 (미래 평가가 학습에 섞이지 않는다)"""
+    order = np.argsort(timestamps, kind='stable')
+    chunks = np.array_split(order, n_folds + 1)
+    return [
+        (np.sort(np.concatenate(chunks[:f + 1])), np.sort(chunks[f + 1]))
+        for f in range(n_folds)
+    ]
+
+
+def make_splits(ratings, n_folds=5, split='random', random_state=0):
+    if split == 'time':
+        return time_splits(ratings.timestamps, n_folds)
+    if split == 'random':
+        return kfold_splits(len(ratings), n_folds, random_state)
+    raise ValueError(f"알 수 없는 분할 방식: {split}")
+
+
+def _subset(ratings, rows):
+    store = RatingsStore(capacity=len(rows))
+    store.extend(*(ratings.column(name)[rows] for name in RatingsStore.COLUMNS))
+    return store
+
+
+def ranking_metrics(recommended, relevant, k):
+    """사용자별 추천 목록과 정답 곡 집합으로 precision/recall/NDCG@k 평균을 구한다"""
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    precision = recall = ndcg = 0.0
+    for recs, truth in zip(recommended, relevant):
+        gains = np.array([song_id in truth for song_id in recs[:k]], dtype=np.float64)
+        hits = gains.sum()
+        precision += hits / k
+        recall += hits / len(truth)
+        ideal = discounts[:min(len(truth), k)].sum()
+        ndcg += (gains @ discounts[:len(gains)]) / ideal
+    n_users = max(len(recommended), 1)
+    return {'precision': precision / n_users, 'recall': recall / n_users, 'ndcg': ndcg / n_users}
+
+
+def evaluate_fold(catalog, ratings, train_rows, test_rows, methods=None, k=10,
+                  relevance_threshold=4.0, max_users=2000, svd_params=None, random_state=0):
+    """한 분할로 학습한 엔진을 평가 구간에 대해 채점한다
+
+    반환값은 {'n_users': 순위 지표를 잰 사용자 수, 'metrics': {추천 방식: 지표}}이다.
+    정답은 평가 구간에서 relevance_threshold 이상을 준 곡이며, 학습 구간에 평가가 있는 사용자 중
+    최대 max_users명을 뽑아 순위 지표를 잰다.
+    """
+    methods = list(methods or METHODS)
+    train = _subset(ratings, train_rows)
+    test_users = ratings.user_ids[test_rows]
+    test_songs = ratings.song_ids[test_rows]
+    test_values = ratings.values[test_rows].astype(np.float64)
+    engine = RecommenderEngine(catalog, train, svd_params, cache_size=0)
+
+    results = {}
+    if 'cf' in methods:
+        cf = engine.recommenders['cf']
+        cf.update()
+        errors = cf.svd_model.predict_many(test_users.tolist(), test_songs.tolist()) - test_values
+        results['cf'] = {
+            'rmse': float(np.sqrt(np.mean(errors ** 2))) if len(errors) else None,
+            'mae': float(np.mean(np.abs(errors))) if len(errors) else None,
+        }
+
+    # 학습 구간에도 평가가 있고 평가 구간에 정답 곡이 있는 사용자만 순위 지표 대상
+    liked = test_values >= relevance_threshold
+    relevant = {}
+    for user_id, song_id in zip(test_users[liked].tolist(), test_songs[liked].tolist()):
+        relevant.setdefault(user_id, set()).add(song_id)
+    users = np.intersect1d(np.fromiter(relevant, dtype=np.int64, count=len(relevant)),
+                           np.unique(train.user_ids))
+    if len(users) > max_users:
+        users = np.random.default_rng(random_state).choice(users, max_users, replace=False)
+    users = users.tolist()
+
+    for method in methods:
+        if not users:
+            results.setdefault(method, {}).update({metric: None for metric in RANKING_METRICS})
+            continue
+        recommendations = engine.recommend_many_ids(users, k, method, n_jobs=1)
+        recommended = [[song_id for song_id, _ in recommendations[user_id]] for user_id in users]
+        metrics = ranking_metrics(recommended, [relevant[user_id] for user_id in users], k)
+        recommended_songs = {song_id for recs in recommended for song_id in recs}
+        metrics['coverage'] = len(recommended_songs) / max(len(catalog), 1)
+        results.setdefault(method, {}).update(metrics)
+    return {'n_users': len(users), 'metrics': results}
+
+
+# 프로세스 풀 워커마다 한 번만 설정되는 읽기 전용 상태
+_worker_state = {}
+
+
+def _init_worker(catalog, ratings, splits, options):
+    _worker_state.update(catalog=catalog, ratings=ratings, splits=splits, options=options)
+
+
+def _evaluate_split(fold):
+    state = _worker_state
+    train_rows, test_rows = state['splits'][fold]
+    started = datetime.now()
+    result = evaluate_fold(state['catalog'], state['ratings'], train_rows, test_rows, **state['options'])
+    logger.info(f"{fold + 1}번째 분할 평가 완료 ({(datetime.now() - started).total_seconds():.1f}초)")
+    return result
+
+
+def cross_validate(catalog, ratings, methods=None, n_folds=5, split='random', k=10,
+                   relevance_threshold=4.0, max_users=2000, svd_params=None, n_jobs=None,
+                   random_state=0):
+    """분할마다 evaluate_fold를 실행하고 (n_jobs개 프로세스로 병렬) 지표의 평균/표준편차를 낸다"""
+    splits = make_splits(ratings, n_folds, split, random_state)
+    options = {
+        'methods': methods,
+        'k': k,
+        'relevance_threshold': relevance_threshold,
+        'max_users': max_users,
+        'svd_params': svd_params,
+        'random_state': random_state,
+    }
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(splits))
+    logger.info(f"평가 {len(ratings)}개를 {split} 방식으로 {len(splits)}개 분할 평가 중... (프로세스 {n_jobs}개)")
+
+    if n_jobs == 1:
+        _init_worker(catalog, ratings, splits, options)
+        folds = [_evaluate_split(fold) for fold in range(len(splits))]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_worker,
+            initargs=(catalog, ratings, splits, options)
+        ) as executor:
+            folds = list(executor.map(_evaluate_split, range(len(splits))))
+
+    return {'folds': folds, 'summary': summarize(folds)}
+
+
+def summarize(folds):
+    """분할별 지표를 {추천 방식: {지표: {'mean', 'std'}}}로 묶는다"""
+    summary = {}
+    for fold in folds:
+        for method, metrics in fold['metrics'].items():
+            for metric, value in metrics.items():
+                if value is not None:
+                    summary.setdefault(method, {}).setdefault(metric, []).append(value)
+    return {
+        method: {
+            metric: {'mean': float(np.mean(values)), 'std': float(np.std(values))}
+            for metric, values in metrics.items()
+        }
+        for method, metrics in summary.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추천기 오프라인 평가 (교차 검증)")
+    parser.add_argument('--ratings', help="평가 덤프 (user_id, song_id, rating, timestamp 열의 CSV/Parquet/JSONL)")
+    parser.add_argument('--history', default=DEFAULT_LOG_PATH,
+                        help="--ratings가 없을 때 사용할 GUI 평가 기록 로그")
+    parser.add_argument('--catalog', help="곡 카탈로그 파일 (없으면 기본 카탈로그)")
+    parser.add_argument('--methods', nargs='+', choices=list(METHODS), help="평가할 추천 방식")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--split', choices=SPLITS, default='random')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--relevance-threshold', type=float, default=4.0,
+                        help="정답으로 볼 최소 평점")
+    parser.add_argument('--max-users', type=int, default=2000,
+                        help="분할마다 순위 지표를 잴 최대 사용자 수")
+    parser.add_argument('--n-jobs', type=int, help="분할을 병렬로 평가할 프로세스 수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="결과 JSON 파일 (없으면 표준 출력)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    catalog = load_catalog(args.catalog) if args.catalog else MusicCatalog()
+    if args.ratings:
+        ratings = load_ratings(args.ratings)
+    else:
+        ratings = ratings_from_history(RatingHistoryLog(args.history).entries(), catalog)
+
+    report = cross_validate(
+        catalog, ratings, args.methods, args.folds, args.split, args.k,
+        args.relevance_threshold, args.max_users, n_jobs=args.n_jobs, random_state=args.seed
+    )
+    for method, metrics in report['summary'].items():
+        logger.info(f"{method}: " + ", ".join(
+            f"{metric}={value['mean']:.4f}±{value['std']:.4f}"
+            for metric, value in metrics.items()
+        ))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
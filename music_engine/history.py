@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""평가 기록을 JSON Lines 형식의 추가 전용 로그로 저장한다
+
+    python -m music_engine.history migrate [rating_history.json] [rating_history.jsonl]
+    python -m music_engine.history compact [rating_history.jsonl]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from . import metrics
+from .ratings import RatingsStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_PATH = 'rating_history.jsonl'
+LEGACY_JSON_PATH = 'rating_history.json'
+
+
+class RatingHistoryLog:
+    """추가 전용 평가 기록 로그
+
+    기록 한 건은 한 줄의 작은 append이며, fsync는 fsync_every건 또는 fsync_interval초마다 묶어서 한다.
+    마지막 기록 뒤에 더 이상 기록이 없어도 fsync_interval초 뒤 타이머가 fsync하므로
+    잃을 수 있는 기록은 최대 fsync_interval초 분량이다.
+    읽기는 마지막으로 읽은 오프셋 이후의 새 바이트만 파싱해 메모리 캐시에 덧붙인다.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, fsync_every=32, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.RLock()
+        self._writer = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer = None
+        self._offset = 0
+        self._entries = []
+
+    def append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock, metrics.timer('history_append'):
+            if self._writer is None:
+                self._writer = open(self.path, 'ab')
+            self._writer.write(line)
+            self._writer.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self.sync()
+            elif self._sync_timer is None:
+                self._sync_timer = threading.Timer(self.fsync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def sync(self):
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._writer is not None and self._unsynced:
+                self._writer.flush()
+                os.fsync(self._writer.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self.sync()
+                self._writer.close()
+                self._writer = None
+
+    def read_new(self):
+        """마지막 오프셋 이후 새로 추가된 기록만 읽어 반환한다"""
+        with self._lock, metrics.timer('history_load'):
+            try:
+                with open(self.path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size < self._offset:
+                        # 다른 프로세스가 압축해 파일이 줄었다면 처음부터 다시 읽는다
+                        self._offset = 0
+                        self._entries = []
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return []
+
+            # 아직 줄바꿈이 기록되지 않은 마지막 줄은 다음 읽기로 미룬다
+            end = data.rfind(b'\n') + 1
+            new_entries = _parse_lines(data[:end])
+            self._offset += end
+            self._entries.extend(new_entries)
+            return new_entries
+
+    def read_since(self, offset):
+        """offset 이후 줄바꿈까지 기록된 항목과 다음에 읽을 오프셋을 반환한다
+
+        캐시와 무관하게 동작하므로, 기록을 따로 따라가는 쪽(예: 통계 집계)이 자기 오프셋으로 쓴다.
+        """
+        with metrics.timer('history_load'):
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return [], offset
+            end = data.rfind(b'\n') + 1
+            return _parse_lines(data[:end]), offset + end
+
+    def file_id(self):
+        """로그 파일 식별자 (압축하면 새 파일로 바뀐다, 파일이 없으면 None)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_dev, stat.st_ino]
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def entries(self):
+        """전체 기록 (캐시 + 새로 추가된 부분)"""
+        with self._lock:
+            self.read_new()
+            return self._entries
+
+    @property
+    def offset(self):
+        return self._offset
+
+    def compact(self):
+        """손상된 줄을 제거하고 로그를 다시 쓴다"""
+        with self._lock:
+            self.close()
+            try:
+                with open(self.path, 'rb') as f:
+                    entries = _parse_lines(f.read())
+            except FileNotFoundError:
+                entries = []
+
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                for entry in entries:
+                    f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            self._offset = os.path.getsize(self.path)
+            self._entries = entries
+            logger.info(f"평가 기록 압축 완료: {len(entries)}건")
+            return len(entries)
+
+    def __len__(self):
+        return len(self.entries())
+
+
+# 기록 목록 정렬 방식
+HISTORY_SORTS = ('newest', 'oldest', 'rating_desc', 'rating_asc', 'genre')
+
+
+class HistoryIndex:
+    """평가 기록 로그의 줄 위치와 필터/정렬용 열(평점, 장르, 시각)만 담은 색인
+
+    항목 내용은 메모리에 두지 않고, 화면에 보이는 줄만 read_entries로 로그에서 바로 읽는다.
+    update는 마지막으로 색인한 위치 이후에 추가된 줄만 읽으며, 로그가 압축되어 파일이 바뀌면 다시 만든다.
+    """
+
+    def __init__(self, history_log):
+        self.log = history_log
+        self.reset()
+
+    def reset(self):
+        self._offsets = array('q')
+        self._ratings = array('b')
+        self._genre_codes = array('i')
+        self._times = array('d')
+        self.genre_names = []
+        self._genre_index = {}
+        self._end = 0
+        self._file_id = None
+
+    def update(self):
+        """새로 추가된 줄을 색인하고 추가된 건수를 반환한다"""
+        with metrics.timer('history_index_update'):
+            return self._update()
+
+    def _update(self):
+        file_id = self.log.file_id()
+        if file_id != self._file_id or self.log.size() < self._end:
+            self.reset()
+            self._file_id = file_id
+        try:
+            with open(self.log.path, 'rb') as f:
+                f.seek(self._end)
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+
+        count = 0
+        pos = 0
+        while True:
+            newline = data.find(b'\n', pos)
+            if newline < 0:
+                break
+            line = data[pos:newline]
+            if line.strip():
+                try:
+                    self._add(self._end + pos, json.loads(line))
+                    count += 1
+                except ValueError:
+                    logger.warning("손상된 평가 기록 줄을 건너뜁니다.")
+            pos = newline + 1
+        self._end += pos
+        return count
+
+    def _add(self, offset, entry):
+        genre = entry.get('genre', '장르 정보 없음')
+        code = self._genre_index.get(genre)
+        if code is None:
+            code = self._genre_index[genre] = len(self.genre_names)
+            self.genre_names.append(genre)
+        try:
+            moment = datetime.fromisoformat(entry['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            moment = float('nan')
+        try:
+            rating = int(entry.get('rating', 0))
+        except (TypeError, ValueError):
+            rating = 0
+
+        self._offsets.append(offset)
+        self._ratings.append(rating)
+        self._genre_codes.append(code)
+        self._times.append(moment)
+
+    def query(self, genre=None, rating=None, start_date=None, end_date=None, sort='newest'):
+        """조건에 맞는 기록 번호를 정렬해 반환한다 (날짜는 'YYYY-MM-DD', end_date는 그날 끝까지 포함)"""
+        if sort not in HISTORY_SORTS:
+            raise ValueError(f"알 수 없는 정렬 방식: {sort}")
+        ratings = np.frombuffer(self._ratings, dtype=np.int8) if len(self._ratings) else np.empty(0, np.int8)
+        codes = np.frombuffer(self._genre_codes, dtype=np.int32) if len(self._genre_codes) else np.empty(0, np.int32)
+        times = np.frombuffer(self._times, dtype=np.float64) if len(self._times) else np.empty(0)
+
+        mask = np.ones(len(ratings), dtype=bool)
+        if genre is not None:
+            mask &= codes == self._genre_index.get(genre, -1)
+        if rating is not None:
+            mask &= ratings == rating
+        if start_date:
+            mask &= times >= datetime.fromisoformat(start_date).timestamp()
+        if end_date:
+            mask &= times < (datetime.fromisoformat(end_date) + timedelta(days=1)).timestamp()
+        rows = np.flatnonzero(mask)
+
+        # 로그는 추가 순서(시간순)이므로 최신순은 뒤집기만 하면 된다
+        if sort == 'newest':
+            return rows[::-1]
+        if sort == 'oldest':
+            return rows
+        if sort == 'genre':
+            name_rank = np.argsort(np.argsort(self.genre_names, kind='stable'))
+            return rows[np.lexsort((-rows, name_rank[codes[rows]]))]
+        direction = -1 if sort == 'rating_desc' else 1
+        return rows[np.lexsort((-rows, direction * ratings[rows].astype(np.int64)))]
+
+    def read_entries(self, rows):
+        """기록 번호에 해당하는 항목만 로그에서 읽는다"""
+        entries = []
+        with metrics.timer('history_page_read'), open(self.log.path, 'rb') as f:
+            for row in rows:
+                f.seek(self._offsets[row])
+                entries.append(json.loads(f.readline()))
+        return entries
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+def _parse_lines(data):
+    entries = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            logger.warning("손상된 평가 기록 줄을 건너뜁니다.")
+    return entries
+
+
+def ratings_from_history(entries, catalog, user_id=1):
+    """GUI 평가 기록(rating_history.jsonl) 항목을 평가 저장소로 바꾼다 (카탈로그에 없는 곡은 제외)"""
+    ratings = RatingsStore(capacity=len(entries))
+    for entry in entries:
+        song_id = catalog.song_id(entry.get('song_info'))
+        if song_id is None:
+            continue
+        try:
+            timestamp = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S').timestamp()
+        except (KeyError, ValueError):
+            timestamp = 0.0
+        ratings.add(user_id, song_id, entry['rating'], timestamp)
+    return ratings
+
+
+def migrate_json_history(json_path=LEGACY_JSON_PATH, log_path=DEFAULT_LOG_PATH):
+    """기존 JSON 배열 형식의 기록을 로그로 한 번만 옮긴다 (옮긴 파일은 .migrated로 이름 변경)"""
+    if not os.path.exists(json_path) or os.path.exists(log_path):
+        return 0
+
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    except (ValueError, UnicodeDecodeError):
+        logger.error(f"{json_path}를 읽을 수 없어 마이그레이션을 건너뜁니다.")
+        return 0
+
+    tmp_path = log_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for entry in history:
+            f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, log_path)
+    os.replace(json_path, json_path + '.migrated')
+
+    logger.info(f"평가 기록 {len(history)}건을 {log_path}로 옮겼습니다.")
+    return len(history)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="평가 기록 로그 관리")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help="rating_history.json을 로그로 변환")
+    migrate.add_argument('json_path', nargs='?', default=LEGACY_JSON_PATH)
+    migrate.add_argument('log_path', nargs='?', default=DEFAULT_LOG_PATH)
+
+    compact = commands.add_parser('compact', help="손상된 줄을 제거하고 로그를 다시 쓰기")
+    compact.add_argument('log_path', nargs='?', default=DEFAULT_LOG_PATH)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == 'migrate':
+        count = migrate_json_history(args.json_path, args.log_path)
+        print(f"{count}건 변환")
+    else:
+        count = RatingHistoryLog(args.log_path).compact()
+        print(f"{count}건 유지")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import heapq
+
+# 하이브리드 추천 기본 가중치
+DEFAULT_HYBRID_WEIGHTS = {
+    'cf': 0.5,
+    'genre': 0.25,
+    'artist': 0.25,
+}
+
+
+class HybridRanker:
+    """여러 추천기의 (곡 ID, 점수) 후보를 하나의 순위로 합친다
+
+    추천기마다 점수를 평점 범위 기준 0~1로 정규화한 뒤 요청한 모든 추천기의 가중치로 가중 평균하고,
+    같은 곡은 곡 ID로 합쳐 한 번만 나온다. 그 곡을 찾지 못한 추천기는 중립 점수(neutral_score, 평점 범위의
+    가운데)를 준 것으로 보므로, 가중치가 낮은 추천기 혼자 찾은 곡이 가중치가 높은 추천기의 상위 곡을
+    앞지르지 못한다. 결과 점수는 다시 평점 범위로 되돌려 "예측 평점"처럼 표시할 수 있다.
+    상위 k개는 크기 k의 힙으로 고른다.
+
+    >>> ranker = HybridRanker({'cf': 1.0, 'genre': 0.01, 'artist': 0.01})
+    >>> [song_id for song_id, _ in ranker.rank(
+    ...     {'cf': [(1, 4.6), (2, 4.4)], 'genre': [(3, 5.0), (4, 5.0), (2, 4.0)], 'artist': []}, 3)]
+    [1, 2, 3]
+    """
+
+    # 곡을 찾지 못한 추천기가 주는 정규화 점수
+    neutral_score = 0.5
+
+    def __init__(self, weights=None, rating_scale=(1, 5)):
+        self.weights = dict(DEFAULT_HYBRID_WEIGHTS, **(weights or {}))
+        self.rating_scale = rating_scale
+
+    def rank(self, candidates, k, min_rating=0):
+        """candidates: {추천기 이름: [(곡 ID, 점수)]}, 반환값: 점수 내림차순 [(곡 ID, 점수)]
+
+        min_rating은 합친 최종 점수에 적용된다.
+        """
+        if len(candidates) == 1:
+            # 단일 추천 방식은 원래 점수 그대로 순위를 매긴다
+            (name, items), = candidates.items()
+            items = (item for item in items if item[1] >= min_rating)
+            return heapq.nlargest(k, items, key=lambda item: item[1])
+
+        low, high = self.rating_scale
+        span = high - low
+        total_weight = sum(self.weights.get(name, 0.0) for name in candidates)
+        if not total_weight:
+            return []
+
+        # 곡 ID -> 중립 점수 대비 가중 점수 차이의 합 (찾지 못한 추천기는 0을 더한 셈)
+        combined = {}
+        for name, items in candidates.items():
+            weight = self.weights.get(name, 0.0) / total_weight
+            if not weight:
+                continue
+            for song_id, score in items:
+                normalized = min(1.0, max(0.0, (score - low) / span))
+                combined[song_id] = combined.get(song_id, 0.0) + weight * (normalized - self.neutral_score)
+
+        scored = (
+            (song_id, low + (self.neutral_score + offset) * span)
+            for song_id, offset in combined.items()
+        )
+        scored = (item for item in scored if item[1] >= min_rating)
+        return heapq.nlargest(k, scored, key=lambda item: item[1])
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ItemNeighborIndex:
+    """곡마다 코사인 유사도가 가장 높은 상위 N개 이웃 곡만 저장한 희소 색인
+
+    (곡 x 곡) 희소 행렬로 저장하며, 행 j에는 곡 j의 이웃 곡과 유사도가 들어 있다.
+    """
+
+    def __init__(self, neighbors, n_ratings=0):
+        self.neighbors = neighbors
+        self.n_ratings = n_ratings
+
+    @classmethod
+    def build(cls, user_ids, song_ids, ratings, n_items, n_neighbors=50, block_size=2048):
+        """사용자 x 곡 CSR 행렬에서 곡-곡 코사인 유사도를 블록 단위로 계산한다
+
+        평점은 사용자 평균을 뺀 값(adjusted cosine)을 사용하고,
+        블록마다 상위 n_neighbors개의 양의 유사도만 남기므로 전체 유사도 행렬은 만들지 않는다.
+        """
+        from scipy import sparse
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        # 같은 사용자가 같은 곡을 다시 평가했으면 마지막 평가만 사용
+        frame = pd.DataFrame({'user_id': user_ids, 'song_id': song_ids, 'rating': ratings})
+        frame = frame[(frame['song_id'] >= 0) & (frame['song_id'] < n_items)]
+        frame = frame.drop_duplicates(['user_id', 'song_id'], keep='last')
+        user_codes, _ = pd.factorize(frame['user_id'])
+        values = frame['rating'].to_numpy(dtype=np.float64)
+        values = values - frame.groupby('user_id')['rating'].transform('mean').to_numpy()
+        # 평균과 같은 평점도 "함께 평가함" 정보로 남도록 0 대신 아주 작은 값을 둔다
+        values[values == 0] = 1e-6
+
+        n_users = int(user_codes.max()) + 1 if len(user_codes) else 1
+        item_users = sparse.csr_matrix(
+            (values, (frame['song_id'].to_numpy(), user_codes)),
+            shape=(n_items, n_users)
+        )
+
+        logger.info(f"곡-곡 유사도 계산 중... (곡 {n_items}개, 이웃 {n_neighbors}개)")
+        indptr = [0]
+        indices = []
+        data = []
+        for start in range(0, n_items, block_size):
+            block = cosine_similarity(
+                item_users[start:start + block_size], item_users, dense_output=False
+            ).tocsr()
+            for row in range(block.shape[0]):
+                lo, hi = block.indptr[row], block.indptr[row + 1]
+                cols = block.indices[lo:hi]
+                sims = block.data[lo:hi]
+                keep = (sims > 0) & (cols != start + row)
+                cols, sims = cols[keep], sims[keep]
+                if len(sims) > n_neighbors:
+                    top = np.argpartition(-sims, n_neighbors - 1)[:n_neighbors]
+                    cols, sims = cols[top], sims[top]
+                indices.append(cols.astype(np.int32))
+                data.append(sims.astype(np.float32))
+                indptr.append(indptr[-1] + len(cols))
+
+        neighbors = sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int64)
+            ),
+            shape=(n_items, n_items)
+        )
+        return cls(neighbors, len(ratings))
+
+    def score(self, rated_items, centered_ratings):
+        """평가한 곡의 이웃만 조회해 (유사도 가중 평점 편차 합, 유사도 합)을 곡별로 구한다"""
+        rows = self.neighbors[rated_items]
+        numerator = rows.T @ centered_ratings
+        denominator = np.asarray(abs(rows).sum(axis=0)).ravel()
+        return numerator, denominator
+
+    def save(self, path):
+        np.savez(
+            path,
+            indptr=self.neighbors.indptr,
+            indices=self.neighbors.indices,
+            data=self.neighbors.data,
+            shape=np.asarray(self.neighbors.shape),
+            n_ratings=np.asarray(self.n_ratings)
+        )
+
+    @classmethod
+    def load(cls, path):
+        from scipy import sparse
+
+        with np.load(path) as arrays:
+            neighbors = sparse.csr_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']),
+                shape=tuple(arrays['shape'])
+            )
+            return cls(neighbors, int(arrays['n_ratings']))
+
+
+class ItemSimilarityRecommender:
+    """곡-곡 유사도(아이템 기반 협업 필터링) 추천기
+
+    예측 평점 = 사용자 평균 + Σ(유사도 x 평점 편차) / Σ|유사도|  (평가한 곡의 이웃 곡만 계산)
+    이웃 색인은 처음 사용할 때 만들고, 평가가 rebuild_threshold 비율 이상 늘면 다시 만든다.
+    rebuild()로 미리(오프라인으로) 만들어 둘 수도 있다.
+    """
+
+    def __init__(self, catalog, ratings, n_neighbors=50, rebuild_threshold=0.2,
+                 rating_scale=(1, 5)):
+        self.catalog = catalog
+        self.ratings = ratings
+        self.n_neighbors = n_neighbors
+        self.rebuild_threshold = rebuild_threshold
+        self.rating_scale = rating_scale
+        self.index = None
+
+    def rebuild(self):
+        n_ratings = len(self.ratings)
+        with metrics.timer('item_index_build'):
+            self.index = ItemNeighborIndex.build(
+                self.ratings.user_ids[:n_ratings],
+                self.ratings.song_ids[:n_ratings],
+                self.ratings.values[:n_ratings],
+                len(self.catalog),
+                self.n_neighbors
+            )
+        return self.index
+
+    def _ensure_index(self):
+        if self.index is None:
+            return self.rebuild()
+        grown = len(self.ratings) - self.index.n_ratings
+        if grown > self.rebuild_threshold * max(self.index.n_ratings, 1):
+            return self.rebuild()
+        return self.index
+
+    def recommend(self, user_id, k=None):
+        logger.info("아이템 기반 추천 계산 중...")
+        index = self._ensure_index()
+        with metrics.timer('item_recommend'):
+            return self._recommend(index, user_id, k)
+
+    def _recommend(self, index, user_id, k):
+        # 다른 스레드가 평가를 추가하는 중에도 세 열의 길이가 같도록 평가 수를 한 번만 읽는다
+        n_ratings = len(self.ratings)
+        mine = self.ratings.user_ids[:n_ratings] == user_id
+        song_ids = self.ratings.song_ids[:n_ratings][mine].astype(np.int64)
+        values = self.ratings.values[:n_ratings][mine].astype(np.float64)
+        valid = (song_ids >= 0) & (song_ids < len(self.catalog))
+        song_ids, values = song_ids[valid], values[valid]
+        if not len(song_ids):
+            return []
+
+        # 같은 곡을 여러 번 평가했으면 마지막 평가만 사용
+        _, last = np.unique(song_ids[::-1], return_index=True)
+        last = len(song_ids) - 1 - last
+        song_ids, values = song_ids[last], values[last]
+        user_mean = values.mean()
+
+        numerator, denominator = index.score(song_ids, values - user_mean)
+        candidates = np.flatnonzero(denominator > 0)
+        candidates = candidates[~np.isin(candidates, song_ids)]
+        if not len(candidates):
+            return []
+
+        low, high = self.rating_scale
+        scores = np.clip(user_mean + numerator[candidates] / denominator[candidates], low, high)
+        if k is not None and k < len(candidates):
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return [(int(song_id), float(score)) for song_id, score in zip(candidates[order], scores[order])]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""추천 서비스 부하 테스트 (초당 처리량과 꼬리 지연 시간)
+
+    python -m music_engine.server --port 8080 &
+    python -m music_engine.loadtest --port 8080 --concurrency 32 --requests 5000 --rate-fraction 0.1
+
+동시 연결 수만큼 스레드가 keep-alive 연결 하나씩으로 /recommend(일부는 /rate)를 보내고,
+경로별 처리량과 지연 시간 분위수를 JSON으로 출력한다.
+"""
+import argparse
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+from .catalog import MusicCatalog, load_catalog
+from .engine import METHODS
+from .server import DEFAULT_HOST, DEFAULT_PORT, RATING_RANGE
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _client(host, port, n_requests, plan, latencies, errors, seed):
+    """요청 n_requests개를 차례로 보내고 경로별 지연 시간(초)을 latencies에 모은다"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    for _ in range(n_requests):
+        path, method, body = plan(rng)
+        route = path.split('?', 1)[0]
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+            errors.append((route, type(e).__name__))
+            continue
+        latencies.setdefault(route, []).append(time.perf_counter() - started)
+        if status >= 400:
+            errors.append((route, status))
+    conn.close()
+
+
+def _latency_report(seconds, elapsed):
+    values = np.asarray(seconds) * 1000
+    report = {'count': len(values), 'qps': len(values) / elapsed}
+    if len(values):
+        report['mean_ms'] = float(values.mean())
+        for q in PERCENTILES:
+            report[f'p{q:g}_ms'] = float(np.percentile(values, q))
+        report['max_ms'] = float(values.max())
+    return report
+
+
+def run_load_test(host=DEFAULT_HOST, port=DEFAULT_PORT, concurrency=16, n_requests=2000, n_users=100,
+                  method='hybrid', k=5, rate_fraction=0.0, catalog=None, seed=0):
+    """동시 연결 concurrency개로 요청 n_requests개를 보내고 처리량과 지연 시간 분위수를 반환한다"""
+    catalog = catalog if catalog is not None else MusicCatalog()
+    song_keys = catalog.song_keys()
+
+    def plan(rng):
+        user_id = rng.randint(1, n_users)
+        if rng.random() < rate_fraction:
+            body = json.dumps({
+                'user_id': user_id,
+                'song': rng.choice(song_keys),
+                'rating': rng.randint(*RATING_RANGE),
+            }, ensure_ascii=False).encode('utf-8')
+            return '/rate', 'POST', body
+        return '/recommend?' + urlencode({'user_id': user_id, 'method': method, 'k': k}), 'GET', None
+
+    per_client = [n_requests // concurrency + (1 if n < n_requests % concurrency else 0)
+                  for n in range(concurrency)]
+    latencies = [{} for _ in range(concurrency)]
+    errors = []
+    threads = [
+        threading.Thread(target=_client, args=(host, port, per_client[n], plan, latencies[n], errors, seed + n),
+                         daemon=True)
+        for n in range(concurrency)
+    ]
+    logger.info(f"부하 테스트 시작: http://{host}:{port} (동시 연결 {concurrency}개, 요청 {n_requests}개)")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    by_route = {}
+    for client_latencies in latencies:
+        for route, seconds in client_latencies.items():
+            by_route.setdefault(route, []).extend(seconds)
+    all_latencies = [value for seconds in by_route.values() for value in seconds]
+    error_counts = {}
+    for route, reason in errors:
+        key = f'{route} {reason}'
+        error_counts[key] = error_counts.get(key, 0) + 1
+    return {
+        'concurrency': concurrency,
+        'requests': n_requests,
+        'elapsed_seconds': elapsed,
+        'errors': len(errors),
+        'error_counts': error_counts,
+        'total': _latency_report(all_latencies, elapsed),
+        'routes': {route: _latency_report(seconds, elapsed) for route, seconds in sorted(by_route.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추천 서비스 부하 테스트")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--concurrency', type=int, default=16, help="동시 연결 수")
+    parser.add_argument('--requests', type=int, default=2000, help="전체 요청 수")
+    parser.add_argument('--users', type=int, default=100, help="요청에 쓸 사용자 ID 범위 (1부터)")
+    parser.add_argument('--method', choices=sorted(METHODS), default='hybrid')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--rate-fraction', type=float, default=0.0, help="/rate 요청 비율")
+    parser.add_argument('--catalog', help="평가할 곡을 고를 카탈로그 파일 (없으면 기본 카탈로그)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="결과 JSON 파일 (없으면 표준 출력)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    catalog = load_catalog(args.catalog) if args.catalog else MusicCatalog()
+    report = run_load_test(
+        args.host, args.port, args.concurrency, args.requests, args.users,
+        args.method, args.k, args.rate_fraction, catalog, args.seed
+    )
+    total = report['total']
+    if total['count']:
+        logger.info(
+            f"{total['qps']:.1f} QPS, p50 {total['p50_ms']:.1f}ms, p99 {total['p99_ms']:.1f}ms, "
+            f"최대 {total['max_ms']:.1f}ms (오류 {report['errors']}건)"
+        )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
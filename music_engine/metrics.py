@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""추천 파이프라인 계측 (단계별 소요 시간 히스토그램과 카운터)
+
+환경 변수 MUSIC_METRICS=1이면 켜지고, MUSIC_METRICS_FILE을 주면 프로세스 종료 시 그 파일에 기록한다
+(.json이면 JSON 스냅샷, 그 외에는 Prometheus 텍스트 형식).
+
+    MUSIC_METRICS=1 MUSIC_METRICS_FILE=metrics.prom python modern_music_recommender.py
+
+꺼져 있으면 timer는 아무 일도 하지 않는 공용 객체를 돌려주고 inc는 바로 반환하므로 비용이 거의 없다.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'music'
+# 소요 시간 히스토그램 구간 상한(초)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _env_enabled():
+    return os.environ.get('MUSIC_METRICS', '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+
+ENABLED = _env_enabled()
+
+
+class Histogram:
+    """고정 구간 소요 시간 히스토그램 (구간별 개수, 합, 최댓값)"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """구간 상한으로 어림한 분위수 (마지막 구간은 최댓값)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for n, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(BUCKETS[n], self.max) if n < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """단계 이름별 히스토그램과 카운터 이름별 값 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+            self.started_at = time.time()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'created_at': time.time(),
+                'stages': {stage: histogram.to_dict() for stage, histogram in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def to_prometheus(self):
+        name = f'{METRIC_PREFIX}_stage_seconds'
+        lines = [f'# TYPE {name} histogram']
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f'# TYPE {METRIC_PREFIX}_{counter}_total counter')
+                lines.append(f'{METRIC_PREFIX}_{counter}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """.json이면 JSON 스냅샷, 그 외에는 Prometheus 텍스트로 기록한다"""
+        if path.lower().endswith('.json'):
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2) + '\n'
+        else:
+            text = self.to_prometheus()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Timer:
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage):
+    """with timer('cf_fit'): ... 블록의 소요 시간을 stage 히스토그램에 기록한다"""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(stage)
+
+
+def timed(stage):
+    """함수 호출의 소요 시간을 stage 히스토그램에 기록하는 데코레이터 (켜져 있는지는 호출할 때 확인)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def inc(name, amount=1):
+    if ENABLED:
+        REGISTRY.inc(name, amount)
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def snapshot():
+    return REGISTRY.snapshot()
+
+
+def to_prometheus():
+    return REGISTRY.to_prometheus()
+
+
+def write(path):
+    REGISTRY.write(path)
+
+
+def _write_on_exit(path):
+    try:
+        REGISTRY.write(path)
+        logger.info(f"계측 결과 저장 완료: {path}")
+    except OSError as e:
+        logger.warning(f"계측 결과를 저장할 수 없습니다: {str(e)}")
+
+
+if ENABLED and os.environ.get('MUSIC_METRICS_FILE'):
+    atexit.register(_write_on_exit, os.environ['MUSIC_METRICS_FILE'])
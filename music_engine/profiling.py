@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""요청 단위 cProfile/tracemalloc 프로파일링
+
+환경 변수 MUSIC_PROFILE_DIR(또는 configure)로 디렉터리를 지정하면 profile_call / profiled로 감싼
+요청마다 <요청 ID>.prof(cProfile 통계)와 <요청 ID>.json(소요 시간, 최대 메모리, 상위 함수와
+할당 위치)을 그 디렉터리에 기록한다. 지정하지 않으면 함수를 그대로 호출한다.
+
+    MUSIC_PROFILE_DIR=profiles python modern_music_recommender.py
+    python -m music_engine.profiling summary profiles --top 10
+"""
+import argparse
+import cProfile
+import functools
+import glob
+import itertools
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY = os.environ.get('MUSIC_PROFILE_DIR') or None
+# 요청 요약에 남길 상위 함수/할당 위치 수
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+
+# cProfile과 tracemalloc은 프로세스 전체에 하나씩만 의미가 있으므로 한 번에 한 요청만 프로파일링한다
+_lock = threading.Lock()
+_sequence = itertools.count(1)
+
+
+def configure(directory):
+    """프로파일 기록 디렉터리를 지정한다 (None이면 끈다)"""
+    global DIRECTORY
+    DIRECTORY = directory
+
+
+def _function_name(key):
+    filename, line, name = key
+    return f"{filename}:{line}({name})" if line else name
+
+
+def top_functions(stats, limit=TOP_FUNCTIONS):
+    """누적 시간 순 상위 함수 [{'function', 'calls', 'tottime', 'cumtime'}]"""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {'function': _function_name(key), 'calls': nc, 'tottime': tt, 'cumtime': ct}
+        for key, (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+def top_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    """요청이 끝났을 때 남아 있는 메모리가 많은 할당 위치 [{'site', 'size_kb', 'count'}]"""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    return [
+        {
+            'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_kb': stat.size / 1024,
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def profile_call(name, func, *args, **kwargs):
+    """func(*args, **kwargs)를 프로파일링하며 실행하고 결과를 반환한다
+
+    다른 요청을 프로파일링하는 중이면 기다리지 않고 그냥 실행한다.
+    """
+    directory = DIRECTORY
+    if directory is None or not _lock.acquire(blocking=False):
+        return func(*args, **kwargs)
+    try:
+        request_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{next(_sequence):04d}-{name}"
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            # 이미 추적 중이면 최대 사용량에 이전 할당이 섞이지 않도록 초기화한다 (Python 3.9 이상)
+            tracemalloc.reset_peak()
+        # 최대 사용량은 이 호출을 시작할 때 추적 중이던 메모리를 뺀 값으로 기록한다
+        baseline, _ = tracemalloc.get_traced_memory()
+        profiler = cProfile.Profile()
+        started_at = datetime.now()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak - baseline, 0)
+            snapshot = tracemalloc.take_snapshot()
+            if started_here:
+                tracemalloc.stop()
+            _write_profile(directory, request_id, name, started_at, seconds, peak, profiler, snapshot)
+    finally:
+        _lock.release()
+
+
+def _write_profile(directory, request_id, name, started_at, seconds, peak, profiler, snapshot):
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profile_path = os.path.join(directory, request_id + '.prof')
+        profiler.dump_stats(profile_path)
+        summary = {
+            'id': request_id,
+            'name': name,
+            'started_at': started_at.isoformat(timespec='milliseconds'),
+            'seconds': seconds,
+            'peak_mb': peak / 2 ** 20,
+            'profile': os.path.basename(profile_path),
+            'top_functions': top_functions(pstats.Stats(profiler)),
+            'top_allocations': top_allocations(snapshot),
+        }
+        with open(os.path.join(directory, request_id + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        logger.info(f"프로파일 저장: {request_id} ({seconds * 1000:.1f}ms, 최대 {summary['peak_mb']:.1f}MB)")
+    except OSError as e:
+        logger.warning(f"프로파일을 저장할 수 없습니다: {str(e)}")
+
+
+def profiled(name):
+    """호출마다 profile_call로 실행하는 데코레이터 (켜져 있는지는 호출할 때 확인)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if DIRECTORY is None:
+                return func(*args, **kwargs)
+            return profile_call(name, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def load_summaries(directory):
+    summaries = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            logger.warning(f"프로파일 요약을 읽을 수 없습니다: {path}")
+    return summaries
+
+
+def summarize(directory, top=10, name=None):
+    """가장 느린 top개 요청과 그 요청들의 cProfile 통계를 합친 상위 함수"""
+    summaries = load_summaries(directory)
+    if name is not None:
+        summaries = [summary for summary in summaries if summary['name'] == name]
+    slowest = sorted(summaries, key=lambda summary: summary['seconds'], reverse=True)[:top]
+
+    functions = []
+    paths = [os.path.join(directory, summary['profile']) for summary in slowest]
+    paths = [path for path in paths if os.path.exists(path)]
+    if paths:
+        functions = top_functions(pstats.Stats(*paths), TOP_FUNCTIONS * 2)
+
+    by_name = {}
+    for summary in summaries:
+        by_name.setdefault(summary['name'], []).append(summary['seconds'])
+    return {
+        'n_requests': len(summaries),
+        'requests_by_name': {
+            request_name: {'count': len(seconds), 'max_seconds': max(seconds),
+                           'mean_seconds': sum(seconds) / len(seconds)}
+            for request_name, seconds in sorted(by_name.items())
+        },
+        'slowest': [
+            {key: summary[key] for key in ('id', 'name', 'started_at', 'seconds', 'peak_mb', 'top_allocations')}
+            for summary in slowest
+        ],
+        'functions': functions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="요청 프로파일 요약")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    summary_parser = subparsers.add_parser('summary', help="가장 느린 요청들의 프로파일을 합쳐 요약한다")
+    summary_parser.add_argument('directory', nargs='?', default=DIRECTORY or 'profiles')
+    summary_parser.add_argument('--top', type=int, default=10, help="요약할 가장 느린 요청 수")
+    summary_parser.add_argument('--name', help="이 이름의 요청만 요약 (예: recommend_hybrid)")
+    summary_parser.add_argument('--output', help="결과 JSON 파일 (없으면 표준 출력)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    report = summarize(args.directory, args.top, args.name)
+    logger.info(f"프로파일 {report['n_requests']}개 중 가장 느린 {len(report['slowest'])}개")
+    for summary in report['slowest']:
+        logger.info(f"{summary['id']}: {summary['seconds'] * 1000:.1f}ms, 최대 {summary['peak_mb']:.1f}MB")
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class RatingsStore:
+    """사용자 평가 데이터 저장소
+
+    열 단위의 타입 지정 배열(int32 사용자/곡 ID, float32 평점, float64 시각)에 평가를 저장한다.
+    배열은 용량이 부족할 때만 두 배로 늘리므로 추가는 분할 상환 O(1)이며,
+    조회는 복사 없는 NumPy 뷰와 DataFrame 뷰로 제공한다.
+    """
+
+    COLUMNS = ['user_id', 'song_id', 'rating', 'timestamp']
+    DTYPES = {
+        'user_id': np.int32,
+        'song_id': np.int32,
+        'rating': np.float32,
+        'timestamp': np.float64,
+    }
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._columns = {
+            name: np.empty(max(capacity, 1), dtype=dtype) for name, dtype in self.DTYPES.items()
+        }
+
+    @classmethod
+    def from_frame(cls, frame):
+        """user_id, song_id, rating 열(timestamp는 선택)을 가진 DataFrame에서 만든다"""
+        missing = {'user_id', 'song_id', 'rating'} - set(frame.columns)
+        if missing:
+            raise ValueError(f"평가 데이터에 필요한 열이 없습니다: {', '.join(sorted(missing))}")
+        timestamps = frame['timestamp'] if 'timestamp' in frame.columns else np.zeros(len(frame))
+        store = cls(capacity=len(frame))
+        store.extend(
+            frame['user_id'].to_numpy(),
+            frame['song_id'].to_numpy(),
+            frame['rating'].to_numpy(),
+            np.asarray(timestamps, dtype=np.float64)
+        )
+        return store
+
+    def _reserve(self, capacity):
+        current = len(self._columns['user_id'])
+        if capacity <= current:
+            return
+        new_capacity = max(capacity, current * 2)
+        for name, column in self._columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def add(self, user_id, song_id, rating, timestamp):
+        n = self._size
+        self._reserve(n + 1)
+        columns = self._columns
+        columns['user_id'][n] = user_id
+        columns['song_id'][n] = song_id
+        columns['rating'][n] = rating
+        columns['timestamp'][n] = timestamp
+        # 값을 모두 쓴 뒤에 크기를 늘려 다른 스레드가 미완성 행을 보지 않게 한다
+        self._size = n + 1
+
+    def extend(self, user_ids, song_ids, ratings, timestamps):
+        """여러 평가를 한 번에 추가한다"""
+        values = {
+            'user_id': user_ids,
+            'song_id': song_ids,
+            'rating': ratings,
+            'timestamp': timestamps,
+        }
+        count = len(user_ids)
+        n = self._size
+        self._reserve(n + count)
+        for name, column in self._columns.items():
+            column[n:n + count] = values[name]
+        self._size = n + count
+
+    def column(self, name, start=0):
+        return self._columns[name][start:self._size]
+
+    @property
+    def user_ids(self):
+        return self.column('user_id')
+
+    @property
+    def song_ids(self):
+        return self.column('song_id')
+
+    @property
+    def values(self):
+        return self.column('rating')
+
+    @property
+    def timestamps(self):
+        return self.column('timestamp')
+
+    def to_frame(self, start=0):
+        size = self._size
+        return pd.DataFrame(
+            {name: self._columns[name][start:size] for name in self.COLUMNS},
+            copy=False
+        )
+
+    def fingerprint(self, count=None):
+        """앞쪽 count개 평가의 지문 (평가 수와 내용 해시)"""
+        count = self._size if count is None else min(count, self._size)
+        digest = hashlib.blake2b(digest_size=16)
+        for name in ['user_id', 'song_id', 'rating']:
+            digest.update(self._columns[name][:count].tobytes())
+        return f"{count}:{digest.hexdigest()}"
+
+    def user_song_ids(self, user_id):
+        # 다른 스레드가 평가를 추가하는 중에도 두 열의 길이가 같도록 평가 수를 한 번만 읽는다
+        size = self._size
+        return np.unique(self._columns['song_id'][:size][self._columns['user_id'][:size] == user_id])
+
+    def __len__(self):
+        return self._size
+
+
+def load_ratings(path):
+    """CSV, Parquet 또는 JSON Lines 평가 덤프(user_id, song_id, rating, timestamp)를 읽는다"""
+    ext = os.path.splitext(path)[1].lower()
+    logger.info(f"평가 데이터 파일 읽는 중: {path}")
+
+    if ext == '.csv':
+        frame = pd.read_csv(path)
+    elif ext in ('.parquet', '.pq'):
+        frame = pd.read_parquet(path)
+    elif ext in ('.jsonl', '.ndjson'):
+        frame = pd.read_json(path, lines=True, dtype=False)
+    else:
+        raise ValueError(f"지원하지 않는 평가 데이터 형식입니다: {ext}")
+
+    return RatingsStore.from_frame(frame)
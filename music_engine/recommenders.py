@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .ann import IVFIndex, recall_report
+from .svd import IncrementalSVD, ModelFormatError
+
+logger = logging.getLogger(__name__)
+
+# 추천에 필요한 최소 평가 수
+MIN_RATINGS = 5
+
+# 협업 필터링 SVD 기본 파라미터
+DEFAULT_SVD_PARAMS = {
+    'n_factors': 100,
+    'n_epochs': 20,
+    'lr_all': 0.005,
+    'reg_all': 0.02,
+}
+
+
+class CollaborativeFilteringRecommender:
+    """SVD 기반 협업 필터링 추천기
+
+    모델은 처음 한 번만 전체 학습하고, 이후에는 새로 들어온 평가만으로 점진 갱신한다.
+    점진 갱신된 평가 비율이 drift_threshold를 넘으면 전체 재학습한다.
+    ann_params(예: {'n_lists': 512, 'nprobe': 8})를 주면 전체 학습 때마다 IVF 근사 색인을 만들고,
+    단일 사용자 추천은 전체 곡 대신 색인이 고른 후보만 점수화한다.
+    """
+
+    def __init__(self, catalog, ratings, svd_params=None, drift_threshold=0.2, ann_params=None):
+        self.catalog = catalog
+        self.ratings = ratings
+        self.svd_params = dict(DEFAULT_SVD_PARAMS, **(svd_params or {}))
+        self.drift_threshold = drift_threshold
+        self.ann_params = ann_params
+        self.svd_model = None
+        self.ann_index = None
+        self.trained_count = 0
+        self._catalog_items = None
+        self._item_song_ids = None
+        self._untrained_song_ids = None
+
+    def update(self):
+        """아직 모델에 반영되지 않은 평가를 학습한다"""
+        n_ratings = len(self.ratings)
+        if n_ratings == self.trained_count and self.svd_model is not None:
+            return self.svd_model
+
+        if self.svd_model is None or self._should_refit(n_ratings):
+            logger.info("협업 필터링 모델 학습 중...")
+            # factorize는 처음 나온 순서대로 번호를 매기므로 IncrementalSVD.fit과 같은 내부 인덱스가 된다
+            with metrics.timer('cf_dataset_build'):
+                users, user_ids = pd.factorize(self.ratings.user_ids[:n_ratings])
+                items, item_ids = pd.factorize(self.ratings.song_ids[:n_ratings])
+            with metrics.timer('cf_fit'):
+                self.svd_model = IncrementalSVD(**self.svd_params)
+                self.svd_model.fit_encoded(
+                    users, items, self.ratings.values[:n_ratings], user_ids.tolist(), item_ids.tolist()
+                )
+            self._catalog_items = None
+            self.ann_index = None
+        else:
+            start = self.trained_count
+            logger.info(f"협업 필터링 모델 갱신 중... (새 평가 {n_ratings - start}개)")
+            with metrics.timer('cf_partial_fit'):
+                self.svd_model.partial_fit(
+                    self.ratings.user_ids[start:n_ratings].tolist(),
+                    self.ratings.song_ids[start:n_ratings].tolist(),
+                    self.ratings.values[start:n_ratings]
+                )
+
+        self.trained_count = n_ratings
+        if self.ann_params is not None and self.ann_index is None:
+            with metrics.timer('ann_build'):
+                self.ann_index = IVFIndex.build(self.svd_model, **self.ann_params)
+        return self.svd_model
+
+    def save_model(self, path):
+        """학습된 모델과 학습에 사용한 평가 데이터의 지문을 저장한다 (근사 색인은 ann.npz)"""
+        if self.svd_model is None:
+            return False
+        self.svd_model.save(path, self.ratings.fingerprint(self.trained_count))
+        if self.ann_index is not None:
+            self.ann_index.save(os.path.join(path, 'ann.npz'))
+        return True
+
+    def load_model(self, path):
+        """저장된 모델이 현재 평가 데이터와 일치하면 학습 없이 바로 사용한다
+
+        모델이 학습한 평가가 현재 저장소의 앞부분과 같아야 하며,
+        그 이후에 추가된 평가는 다음 update에서 점진 갱신된다.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            model, fingerprint = IncrementalSVD.load(path)
+        except ModelFormatError as e:
+            logger.warning(f"저장된 모델을 사용할 수 없습니다: {str(e)}")
+            return False
+
+        if any(getattr(model, name) != value for name, value in self.svd_params.items()
+               if name != 'n_epochs'):
+            logger.info("저장된 모델의 SVD 설정이 현재 설정과 달라 사용하지 않습니다.")
+            return False
+
+        trained_count = model.n_trained + model.n_updates
+        if fingerprint is None or fingerprint != self.ratings.fingerprint(trained_count) \
+                or trained_count > len(self.ratings):
+            logger.info("저장된 모델이 현재 평가 데이터와 맞지 않아 사용하지 않습니다.")
+            return False
+
+        self.svd_model = model
+        self.trained_count = trained_count
+        self._catalog_items = None
+        self.ann_index = None
+        ann_path = os.path.join(path, 'ann.npz')
+        if self.ann_params is not None and os.path.exists(ann_path):
+            index = IVFIndex.load(ann_path)
+            if index.n_indexed <= len(model.bi):
+                self.ann_index = index
+        logger.info(f"저장된 협업 필터링 모델을 불러왔습니다 (평가 {trained_count}개)")
+        return True
+
+    def _should_refit(self, n_ratings):
+        n_new = n_ratings - self.trained_count
+        return self.svd_model.drift() + n_new / max(self.svd_model.n_trained, 1) > self.drift_threshold
+
+    def catalog_items(self):
+        """카탈로그 곡 ID에 대응하는 모델 내부 인덱스 (새 곡이 학습될 때만 다시 계산)"""
+        n_known = len(self.svd_model.item_index)
+        if self._catalog_items is None or self._catalog_items[0] != n_known:
+            self._catalog_items = (n_known, self.svd_model.inner_item_ids(self.catalog.song_ids))
+        return self._catalog_items[1]
+
+    def item_song_ids(self):
+        """모델 내부 인덱스에 대응하는 곡 ID (카탈로그에 없는 곡은 -1)"""
+        n_known = len(self.svd_model.item_index)
+        if self._item_song_ids is None or self._item_song_ids[0] != n_known:
+            song_ids = np.fromiter(self.svd_model.item_index, dtype=np.int64, count=n_known)
+            song_ids[(song_ids < 0) | (song_ids >= len(self.catalog))] = -1
+            self._item_song_ids = (n_known, song_ids, np.flatnonzero(song_ids < 0))
+        return self._item_song_ids[1]
+
+    def non_catalog_items(self):
+        """카탈로그에 없는 곡의 모델 내부 인덱스"""
+        self.item_song_ids()
+        return self._item_song_ids[2]
+
+    def untrained_song_ids(self):
+        """모델이 아직 학습하지 않은 카탈로그 곡 ID (카탈로그 순서)"""
+        n_known = len(self.svd_model.item_index)
+        if self._untrained_song_ids is None or self._untrained_song_ids[0] != n_known:
+            song_ids = self.catalog.song_ids[self.catalog_items() < 0]
+            self._untrained_song_ids = (n_known, song_ids)
+        return self._untrained_song_ids[1]
+
+    def recommend(self, user_id, k=None):
+        if len(self.ratings) < MIN_RATINGS:
+            logger.warning("평가 데이터가 부족하여 협업 필터링을 수행할 수 없습니다.")
+            return []
+
+        try:
+            self.update()
+            if self.ann_index is not None and k is not None:
+                with metrics.timer('cf_score_ann'):
+                    return self._recommend_approximate(user_id, k)
+
+            # 평가하지 않은 모든 곡을 한 번에 점수화하고 상위 k개만 선택
+            with metrics.timer('cf_score'):
+                song_ids = self.catalog.song_ids
+                rated_songs = self.ratings.user_song_ids(user_id)
+                exclude = np.isin(song_ids, rated_songs)
+                top, scores = self.svd_model.top_k(
+                    user_id,
+                    self.catalog_items(),
+                    len(song_ids) if k is None else k,
+                    exclude
+                )
+
+            return [(int(song_ids[pos]), float(score)) for pos, score in zip(top, scores)]
+
+        except Exception as e:
+            logger.error(f"협업 필터링 중 오류 발생: {str(e)}")
+            return []
+
+    def _recommend_approximate(self, user_id, k):
+        # 전체 곡에 대한 마스크 대신 평가한 곡과 카탈로그 밖 곡의 내부 인덱스만 넘기면,
+        # 색인이 탐색한 후보에서 이들을 뺀 뒤 상위 k개를 고른다
+        item_song_ids = self.item_song_ids()
+        rated_songs = self.ratings.user_song_ids(user_id)
+        rated_items = self.svd_model.inner_item_ids(rated_songs)
+        exclude = np.concatenate([rated_items[rated_items >= 0], self.non_catalog_items()])
+        items, scores = self.ann_index.search(self.svd_model, user_id, k, exclude)
+        results = [(int(item_song_ids[item]), float(score)) for item, score in zip(items, scores)]
+
+        # 색인은 모델이 학습한 곡만 담으므로, 정확 경로와 같은 후보가 되도록 평가가 없는 카탈로그 곡은
+        # 정확 경로처럼 전역 평균 + 사용자 편향(모두 같은 점수)으로 점수화해 합친다
+        untrained = self.untrained_song_ids()
+        if len(untrained):
+            # 평가한 곡이 빠져도 k개가 남도록 평가 수만큼 더 꺼낸다
+            untrained = untrained[:k + len(rated_songs)]
+            untrained = untrained[~np.isin(untrained, rated_songs)][:k]
+            base = float(self.svd_model.score_items(user_id, np.full(1, -1, dtype=np.int64))[0])
+            results.extend((int(song_id), base) for song_id in untrained)
+            results.sort(key=lambda item: item[1], reverse=True)
+            del results[k:]
+        return results
+
+    def ann_recall_report(self, user_ids, k=10, nprobes=(1, 2, 4, 8, 16, 32)):
+        """근사 색인의 nprobe별 recall@k와 지연 시간 (색인이 없으면 지금 만든다)"""
+        self.update()
+        if self.ann_index is None:
+            self.ann_index = IVFIndex.build(self.svd_model, **(self.ann_params or {}))
+        return recall_report(self.svd_model, self.ann_index, user_ids, k, nprobes)
+
+    def recommend_many(self, user_ids, k, block_size=1024):
+        """여러 사용자를 사용자 블록 단위 행렬 곱으로 한 번에 추천한다"""
+        if len(self.ratings) < MIN_RATINGS:
+            logger.warning("평가 데이터가 부족하여 협업 필터링을 수행할 수 없습니다.")
+            return [[] for _ in user_ids]
+
+        self.update()
+
+        with metrics.timer('cf_score_many'):
+            # 이미 평가한 (사용자 위치, 곡 위치) 조합
+            # 다른 스레드가 평가를 추가하는 중에도 두 열의 길이가 같도록 평가 수를 한 번만 읽는다
+            n_ratings = len(self.ratings)
+            rows = pd.Index(user_ids).get_indexer(self.ratings.user_ids[:n_ratings])
+            cols = self.ratings.song_ids[:n_ratings].astype(np.int64)
+            rated = (rows >= 0) & (cols >= 0) & (cols < len(self.catalog))
+
+            song_ids = self.catalog.song_ids
+            results = self.svd_model.top_k_many(
+                user_ids,
+                self.catalog_items(),
+                k,
+                (rows[rated].astype(np.int64), cols[rated]),
+                block_size
+            )
+        return [
+            [(int(song_ids[pos]), float(score)) for pos, score in zip(top, scores)]
+            for top, scores in results
+        ]
+
+
+class GroupPreferenceRecommender:
+    """장르/아티스트처럼 곡을 묶는 그룹에 대한 사용자 선호도 기반 추천기
+
+    사용자의 평가를 곡 -> 그룹 코드로 묶어 한 번의 bincount로 그룹별 평균을 구하고,
+    평균이 min_score를 넘는 그룹의 역색인에서 아직 평가하지 않은 곡을 그 평균 점수로 추천한다.
+    """
+
+    label = "그룹"
+    # 계측 단계 이름 접두사
+    name = "group"
+    min_score = 0
+
+    def __init__(self, catalog, ratings):
+        self.catalog = catalog
+        self.ratings = ratings
+
+    def group_codes(self):
+        raise NotImplementedError
+
+    def group_songs(self):
+        raise NotImplementedError
+
+    def recommend(self, user_id, k=None):
+        return self.recommend_many([user_id], k)[0]
+
+    def recommend_many(self, user_ids, k=None):
+        logger.info(f"{self.label} 기반 추천 계산 중...")
+        with metrics.timer(f'{self.name}_recommend'):
+            return self._recommend_many(user_ids, k)
+
+    def _recommend_many(self, user_ids, k):
+        codes = self.group_codes()
+        group_songs = self.group_songs()
+        n_groups = len(group_songs)
+
+        # 대상 사용자의 평가만 골라 (사용자 위치, 그룹) 단위로 한 번에 집계
+        # 다른 스레드가 평가를 추가하는 중에도 세 열의 길이가 같도록 평가 수를 한 번만 읽는다
+        n_ratings = len(self.ratings)
+        rows = pd.Index(user_ids).get_indexer(self.ratings.user_ids[:n_ratings])
+        song_ids = self.ratings.song_ids[:n_ratings].astype(np.int64)
+        valid = (rows >= 0) & (song_ids >= 0) & (song_ids < len(self.catalog))
+        rows, song_ids, values = rows[valid], song_ids[valid], self.ratings.values[:n_ratings][valid]
+
+        keys, inverse = np.unique(rows * n_groups + codes[song_ids], return_inverse=True)
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=values) / counts
+        key_bounds = np.searchsorted(keys // n_groups, np.arange(len(user_ids) + 1))
+
+        order = np.argsort(rows, kind='stable')
+        rated_bounds = np.searchsorted(rows[order], np.arange(len(user_ids) + 1))
+        rated_songs = song_ids[order]
+
+        results = []
+        for n in range(len(user_ids)):
+            lo, hi = key_bounds[n], key_bounds[n + 1]
+            groups = keys[lo:hi] % n_groups
+            scores = means[lo:hi]
+            liked = scores > self.min_score
+            rated = rated_songs[rated_bounds[n]:rated_bounds[n + 1]]
+            results.append(self._recommend_groups(groups[liked], scores[liked], rated, k))
+        return results
+
+    def _recommend_groups(self, groups, scores, rated, k):
+        # 같은 그룹의 곡은 점수가 같으므로 점수 높은 그룹부터 필요한 만큼만 꺼낸다
+        group_songs = self.group_songs()
+        recommendations = []
+        for n in np.argsort(-scores, kind='stable'):
+            songs = group_songs[groups[n]]
+            if k is not None:
+                songs = songs[:k - len(recommendations) + len(rated)]
+            songs = songs[~np.isin(songs, rated)]
+            if k is not None:
+                songs = songs[:k - len(recommendations)]
+
+            score = float(scores[n])
+            recommendations.extend((int(song_id), score) for song_id in songs)
+            if k is not None and len(recommendations) >= k:
+                break
+        return recommendations
+
+
+class GenreRecommender(GroupPreferenceRecommender):
+    """장르 선호도 기반 추천기 (사용자의 장르별 평균 평점)"""
+
+    label = "장르"
+    name = "genre"
+
+    def group_codes(self):
+        return self.catalog.genre_codes
+
+    def group_songs(self):
+        return self.catalog.genre_songs
+
+
+class ArtistRecommender(GroupPreferenceRecommender):
+    """아티스트 선호도 기반 추천기 (평균 3점을 넘는 아티스트의 다른 곡)"""
+
+    label = "아티스트"
+    name = "artist"
+    min_score = 3
+
+    def group_codes(self):
+        return self.catalog.artist_codes
+
+    def group_songs(self):
+        return self.catalog.artist_songs
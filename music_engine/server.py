@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""추천 엔진 JSON HTTP 서비스 (표준 라이브러리 asyncio만 사용)
+
+    python -m music_engine.server --port 8080 --workers 4
+
+    GET    /recommend?user_id=1&method=hybrid&k=5&min_rating=0
+    POST   /rate        {"user_id": 1, "song": "제목 - 아티스트", "rating": 4}
+    GET    /playlists   (name=이름을 주면 그 플레이리스트의 곡)
+    POST   /playlists   {"name": "이름", "songs": ["제목 - 아티스트", ...]}  (songs가 없으면 빈 플레이리스트)
+    DELETE /playlists?name=이름
+    GET    /stats?user_id=1  (user_id가 없으면 전체)
+
+평가와 플레이리스트는 GUI와 같은 SQLite 저장소(music.db)에 기록한다. 추천 점수 계산은 워커 프로세스
+(--workers 1이면 별도 스레드)에서 하며, 워커가 바쁜 동안 들어온 같은 설정의 요청은 한 묶음으로 모아
+recommend_many_ids의 사용자 블록 행렬 곱 한 번으로 계산한다. 워커는 각자 엔진을 들고 있다가
+묶음을 받을 때 저장소에서 새 평가만 읽어 따라잡는다.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from . import metrics, profiling
+from .catalog import MusicCatalog, load_catalog
+from .engine import METHODS, NotEnoughRatingsError, RecommenderEngine
+from .recommenders import MIN_RATINGS
+from .stats import RunningStats
+from .storage import DEFAULT_DB_PATH, SQLiteStorage
+from .tuning import load_tuned_params
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_MODEL_PATH = 'svd_model'
+# GUI 평점 슬라이더와 같은 범위
+RATING_RANGE = (1, 5)
+MAX_K = 100
+MAX_BODY_SIZE = 1 << 20
+
+
+class RequestError(ValueError):
+    """클라이언트에 status와 함께 돌려줄 요청 오류"""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+# 워커(프로세스 또는 스레드)마다 한 번만 만드는 엔진과 저장소 연결
+_worker = {}
+
+
+def _init_worker(db_path, catalog, svd_params, model_path):
+    storage = SQLiteStorage(db_path)
+    storage.register_catalog(catalog)
+    last_id = storage.last_rating_id()
+    engine = RecommenderEngine(catalog, storage.load_ratings_store(until_id=last_id),
+                               svd_params=svd_params, model_path=model_path)
+    engine.warm_start()
+    if len(engine.ratings) >= MIN_RATINGS:
+        engine.recommenders['cf'].update()
+    _worker.update(storage=storage, engine=engine, last_id=last_id)
+
+
+def _catch_up(version):
+    # 서비스가 기록한 평가 중 이 워커가 아직 보지 못한 것만 엔진에 더한다
+    if version <= _worker['last_id']:
+        return
+    engine = _worker['engine']
+    last_id, user_ids, song_ids, ratings, timestamps = _worker['storage'].ratings_after(_worker['last_id'])
+    engine.ratings.extend(user_ids, song_ids, ratings, timestamps)
+    for user_id in set(user_ids.astype(int).tolist()):
+        engine.invalidate(user_id)
+    _worker['last_id'] = last_id
+
+
+def _recommend_batch(version, user_ids, method, k, min_rating):
+    """한 묶음의 사용자 추천 {user_id: [(곡 ID, 점수)]} (워커에서 실행)"""
+    _catch_up(version)
+    engine = _worker['engine']
+    if len(user_ids) == 1:
+        # 한 명이면 결과 캐시를 쓰는 단건 경로가 더 빠르다
+        return profiling.profile_call(
+            f'recommend_{method}',
+            lambda: {user_ids[0]: engine.recommend_ids(user_ids[0], method, k, min_rating)}
+        )
+    return profiling.profile_call(
+        f'recommend_many_{method}',
+        engine.recommend_many_ids, user_ids, k, method, min_rating, n_jobs=1
+    )
+
+
+class RecommendBatcher:
+    """같은 (방식, k, 최소 평점)의 추천 요청을 모아 한 번에 계산한다
+
+    놀고 있는 워커가 있으면 요청을 바로 보내고, 워커가 모두 바쁜 동안 들어온 요청은 설정별로 모아 두었다가
+    워커가 비는 대로 최대 max_batch명씩 한 묶음으로 보낸다. 따라서 한가할 때는 기다리는 시간이 없고,
+    붐빌수록 묶음이 커져 요청당 비용이 줄어든다. 같은 사용자가 한 묶음에 여러 번 들어오면 한 번만 계산한다.
+    """
+
+    def __init__(self, score_batch, capacity=1, max_batch=64):
+        self.score_batch = score_batch
+        self.capacity = capacity
+        self.max_batch = max_batch
+        self._pending = OrderedDict()
+        self._in_flight = 0
+
+    async def recommend(self, user_id, method, k, min_rating):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault((method, k, min_rating), []).append((user_id, future))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        # 가장 오래 기다린 설정의 묶음부터 보낸다
+        while self._pending and self._in_flight < self.capacity:
+            key, batch = self._pending.popitem(last=False)
+            if len(batch) > self.max_batch:
+                self._pending[key] = batch[self.max_batch:]
+                self._pending.move_to_end(key, last=False)
+                batch = batch[:self.max_batch]
+            self._in_flight += 1
+            asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key, batch):
+        user_ids = list(dict.fromkeys(user_id for user_id, _ in batch))
+        metrics.inc('server_batches')
+        metrics.inc('server_batched_requests', len(batch))
+        try:
+            results = await self.score_batch(user_ids, *key)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+        for user_id, future in batch:
+            if not future.done():
+                future.set_result(results[user_id])
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body.decode('utf-8')) if body else {}
+    except (UnicodeDecodeError, ValueError):
+        raise RequestError("요청 본문이 올바른 JSON이 아닙니다.")
+    if not isinstance(data, dict):
+        raise RequestError("요청 본문은 JSON 객체여야 합니다.")
+    return data
+
+
+def _param(params, name, cast, default=None):
+    value = params.get(name, default)
+    if value is None:
+        raise RequestError(f"{name} 값이 필요합니다.")
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise RequestError(f"올바르지 않은 {name} 값입니다: {value}")
+
+
+class RecommendationService:
+    """GUI의 추천/평가/플레이리스트/통계 기능을 JSON HTTP로 제공한다"""
+
+    def __init__(self, catalog=None, db_path=DEFAULT_DB_PATH, svd_params=None,
+                 model_path=DEFAULT_MODEL_PATH, workers=None, max_batch=64):
+        self.catalog = catalog if catalog is not None else MusicCatalog()
+        self.storage = SQLiteStorage(db_path)
+        self.storage.register_catalog(self.catalog)
+        self.version = self.storage.last_rating_id()
+        self._dirty = False
+        # SQLite 호출은 이벤트 루프를 막지 않도록 한 스레드에서 차례로 실행한다
+        self.io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage')
+
+        workers = workers or os.cpu_count() or 1
+        initargs = (db_path, self.catalog, svd_params, model_path)
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=initargs)
+        else:
+            _init_worker(*initargs)
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommend')
+        self.workers = workers
+        self.batcher = RecommendBatcher(self._score_batch, workers, max_batch)
+        self.routes = {
+            ('GET', '/recommend'): self.recommend,
+            ('POST', '/rate'): self.rate,
+            ('GET', '/playlists'): self.get_playlists,
+            ('POST', '/playlists'): self.save_playlist,
+            ('DELETE', '/playlists'): self.delete_playlist,
+            ('GET', '/stats'): self.stats,
+        }
+
+    def close(self):
+        self.executor.shutdown()
+        self.io_executor.submit(self.storage.close).result()
+        self.io_executor.shutdown()
+
+    async def _io(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, func, *args)
+
+    async def _sync_ratings(self):
+        # 쓰기 버퍼의 평가를 기록하고 워커가 따라잡을 평가 ID를 갱신한다
+        if self._dirty:
+            self._dirty = False
+            self.version = await self._io(self.storage.last_rating_id)
+
+    async def _sync_periodically(self):
+        # 추천 요청이 없어도 평가가 flush_interval초 넘게 버퍼에 머물지 않게 한다
+        while True:
+            await asyncio.sleep(self.storage.flush_interval)
+            await self._sync_ratings()
+
+    async def _score_batch(self, user_ids, method, k, min_rating):
+        await self._sync_ratings()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, _recommend_batch, self.version, user_ids, method, k, min_rating
+        )
+
+    # 요청 처리기: (쿼리 매개변수, 본문) -> 응답 JSON 객체
+
+    async def recommend(self, params, body):
+        user_id = _param(params, 'user_id', int)
+        method = params.get('method', 'hybrid')
+        if method not in METHODS:
+            raise RequestError(f"알 수 없는 추천 방식: {method} (가능한 값: {', '.join(METHODS)})")
+        k = _param(params, 'k', int, 5)
+        if not 1 <= k <= MAX_K:
+            raise RequestError(f"k는 1 이상 {MAX_K} 이하여야 합니다.")
+        min_rating = _param(params, 'min_rating', float, 0)
+
+        recommendations = await self.batcher.recommend(user_id, method, k, min_rating)
+        return {
+            'user_id': user_id,
+            'method': method,
+            'recommendations': [
+                {'song': self.catalog.song_key(song_id), 'song_id': int(song_id), 'score': float(score)}
+                for song_id, score in recommendations
+            ],
+        }
+
+    async def rate(self, params, body):
+        data = _json_body(body)
+        user_id = _param(data, 'user_id', int)
+        song = data.get('song')
+        song_id = self.catalog.song_id(song) if isinstance(song, str) else None
+        if song_id is None:
+            raise RequestError(f"카탈로그에 없는 곡입니다: {song}", HTTPStatus.NOT_FOUND)
+        rating = _param(data, 'rating', float)
+        if not RATING_RANGE[0] <= rating <= RATING_RANGE[1]:
+            raise RequestError(f"평점은 {RATING_RANGE[0]} 이상 {RATING_RANGE[1]} 이하여야 합니다.")
+
+        # 버퍼에만 넣고, 다음 추천 묶음을 보내기 전에 한꺼번에 기록한다
+        await self._io(self.storage.add_rating, user_id, song_id, rating)
+        self._dirty = True
+        metrics.inc('ratings_ingested')
+        return {'user_id': user_id, 'song': song, 'song_id': song_id, 'rating': rating}
+
+    async def get_playlists(self, params, body):
+        name = params.get('name')
+        if name is None:
+            return {'playlists': await self._io(self.storage.playlists)}
+        if name not in await self._io(self.storage.playlists):
+            raise RequestError(f"플레이리스트가 없습니다: {name}", HTTPStatus.NOT_FOUND)
+        return {'name': name, 'songs': await self._io(self.storage.playlist_songs, name)}
+
+    async def save_playlist(self, params, body):
+        data = _json_body(body)
+        name = str(data.get('name') or '').strip()
+        if not name:
+            raise RequestError("플레이리스트 이름을 입력해주세요.")
+        songs = data.get('songs')
+        if songs is None:
+            if not await self._io(self.storage.create_playlist, name):
+                raise RequestError("이미 존재하는 플레이리스트 이름입니다.", HTTPStatus.CONFLICT)
+            return {'name': name, 'songs': []}
+
+        if not isinstance(songs, list):
+            raise RequestError("songs는 곡 목록이어야 합니다.")
+        unknown = [song for song in songs if not isinstance(song, str) or self.catalog.song_id(song) is None]
+        if unknown:
+            raise RequestError(f"카탈로그에 없는 곡입니다: {', '.join(map(str, unknown))}",
+                               HTTPStatus.NOT_FOUND)
+        await self._io(self.storage.set_playlist_songs, name, songs)
+        return {'name': name, 'songs': songs}
+
+    async def delete_playlist(self, params, body):
+        name = _param(params, 'name', str)
+        if not await self._io(self.storage.delete_playlist, name):
+            raise RequestError(f"플레이리스트가 없습니다: {name}", HTTPStatus.NOT_FOUND)
+        return {'name': name, 'deleted': True}
+
+    async def stats(self, params, body):
+        user_id = _param(params, 'user_id', int) if 'user_id' in params else None
+        genres = await self._io(self.storage.genre_aggregates, user_id)
+        overall = RunningStats()
+        for genre_stats in genres.values():
+            count, mean, std = genre_stats['count'], genre_stats['mean'], genre_stats['std']
+            overall.merge(RunningStats(count, mean * count, (std ** 2 + mean ** 2) * count))
+        return {'user_id': user_id, 'overall': overall.to_dict(), 'genres': genres}
+
+    # HTTP
+
+    async def dispatch(self, method, target, body):
+        """(HTTP 상태, 응답 JSON 객체)"""
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': f"허용되지 않는 메서드입니다: {method}"}
+            return HTTPStatus.NOT_FOUND, {'error': f"알 수 없는 경로입니다: {url.path}"}
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            with metrics.timer(f'http{url.path.replace("/", "_")}'):
+                return HTTPStatus.OK, await handler(params, body)
+        except (RequestError, NotEnoughRatingsError) as e:
+            # 추천 방식은 처리기에서 먼저 검사하므로 엔진의 추천 방식 ValueError는 여기까지 오지 않는다
+            return getattr(e, 'status', HTTPStatus.BAD_REQUEST), {'error': str(e)}
+        except Exception:
+            # 그 밖의 오류(ValueError 포함)는 서버 버그이므로 추적 정보와 함께 남기고 500으로 응답한다
+            logger.exception(f"요청 처리 중 오류 발생 ({method} {url.path})")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "요청 처리 중 문제가 발생했습니다."}
+
+    async def handle_connection(self, reader, writer):
+        """HTTP/1.1 연결 하나 (keep-alive면 여러 요청을 차례로 처리)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': "잘못된 요청입니다."}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_SIZE:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {'error': "요청 본문이 너무 큽니다."}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.dispatch(method.upper(), target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(
+            f"추천 서비스 시작: http://{host}:{port} (추천 워커 {self.workers}개, "
+            f"묶음 최대 {self.batcher.max_batch}명)"
+        )
+        sync_task = asyncio.ensure_future(self._sync_periodically())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sync_task.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추천 엔진 JSON HTTP 서비스")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="평가/플레이리스트 SQLite 저장소")
+    parser.add_argument('--catalog', help="곡 카탈로그 파일 (없으면 기본 카탈로그)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="저장된 SVD 모델 경로 (있으면 재학습 없이 사용)")
+    parser.add_argument('--workers', type=int, help="추천 점수를 계산할 프로세스 수 (1이면 스레드 하나)")
+    parser.add_argument('--max-batch', type=int, default=64, help="한 번에 계산할 최대 사용자 수")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    catalog = load_catalog(args.catalog) if args.catalog else MusicCatalog()
+    service = RecommendationService(
+        catalog, args.db, load_tuned_params(), args.model, args.workers, args.max_batch
+    )
+    # SIGTERM으로 멈출 때도 버퍼에 남은 평가를 기록하고 워커를 정리한다
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("추천 서비스를 종료합니다.")
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS_PATH = 'rating_stats.json'
+STATS_FORMAT_VERSION = 1
+
+# 시간 구간 키 계산 기준 (벽시계 시각 기준이므로 서머타임과 무관하다)
+_EPOCH = datetime(1970, 1, 1)
+BUCKETS = ('hour', 'day', 'week')
+# 추이 차트에 그릴 최대 점 수
+MAX_TREND_POINTS = 200
+
+
+class RunningStats:
+    """평가 수, 합, 제곱합만 유지하는 누적 통계"""
+
+    __slots__ = ('count', 'total', 'total_sq')
+
+    def __init__(self, count=0, total=0.0, total_sq=0.0):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(self.total_sq / self.count - self.mean ** 2, 0.0))
+
+    def to_list(self):
+        return [self.count, self.total, self.total_sq]
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std}
+
+
+def _hour_key(moment):
+    return int((moment - _EPOCH).total_seconds() // 3600)
+
+
+def _bucket_key(hour, bucket):
+    if bucket == 'hour':
+        return hour
+    day = hour // 24
+    if bucket == 'day':
+        return day
+    # 1970-01-01은 목요일이므로 월요일 시작 주로 맞춘다
+    return (day + 3) // 7
+
+
+def _bucket_start(key, bucket):
+    if bucket == 'hour':
+        return _EPOCH + timedelta(hours=key)
+    if bucket == 'day':
+        return _EPOCH + timedelta(days=key)
+    return _EPOCH + timedelta(days=key * 7 - 3)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets 다운샘플링: 모양을 유지하는 n_out개 점의 위치를 고른다"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # 첫 점과 마지막 점은 항상 남기고, 가운데 점들을 n_out - 2개 구간으로 나눈다
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        # 다음 구간의 평균 점 (마지막 구간은 마지막 점)
+        next_end = edges[b + 2] if b + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        prev = selected[b]
+        areas = np.abs(
+            (x[prev] - next_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (next_y - y[prev])
+        )
+        selected[b + 1] = start + int(np.argmax(areas))
+    return selected
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RatingStatsAggregator:
+    """평가 기록의 장르/아티스트/시간 구간별 누적 통계
+
+    새 평가 한 건은 O(1)로 반영되고, 상태는 rating_stats.json에 저장된다.
+    평가 기록 로그의 어디까지 반영했는지(오프셋과 파일 식별자)도 함께 저장하므로,
+    sync는 그 이후에 추가된 줄만 읽으며 로그가 압축되어 파일이 바뀌면 처음부터 다시 집계한다.
+    시간 구간은 시간 단위로 저장하고 일/주 단위는 요청할 때 합친다.
+    """
+
+    def __init__(self, path=DEFAULT_STATS_PATH, catalog=None):
+        self.path = path
+        self.catalog = catalog
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.overall = RunningStats()
+            self.genres = {}
+            self.artists = {}
+            self.hours = {}
+            self.log_offset = 0
+            self.log_file_id = None
+
+    def add(self, rating, genre=None, artist=None, moment=None):
+        with self._lock:
+            self.overall.add(rating)
+            if genre is not None:
+                self.genres.setdefault(genre, RunningStats()).add(rating)
+            if artist is not None:
+                self.artists.setdefault(artist, RunningStats()).add(rating)
+            if moment is not None:
+                self.hours.setdefault(_hour_key(moment), RunningStats()).add(rating)
+
+    def add_entry(self, entry):
+        """평가 기록 항목({'timestamp', 'genre', 'song_info', 'rating'}) 하나를 반영한다"""
+        try:
+            rating = float(entry['rating'])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.add(rating, entry.get('genre'), self._artist_of(entry),
+                 _parse_timestamp(entry.get('timestamp')))
+
+    def _artist_of(self, entry):
+        song_info = entry.get('song_info')
+        if song_info is None:
+            return entry.get('artist')
+        if self.catalog is not None:
+            song_id = self.catalog.song_id(song_info)
+            if song_id is not None:
+                return self.catalog.artist_of(song_id)
+        # 카탈로그에 없는 곡은 "제목 - 아티스트" 형식에서 아티스트를 꺼낸다
+        parts = song_info.rsplit(' - ', 1)
+        return parts[1] if len(parts) == 2 else None
+
+    def sync(self, history_log):
+        """평가 기록 로그에서 아직 반영하지 않은 줄만 읽어 반영한다 (반영한 건수 반환)"""
+        with self._lock, metrics.timer('stats_sync'):
+            file_id = history_log.file_id()
+            if file_id != self.log_file_id or history_log.size() < self.log_offset:
+                if self.log_offset:
+                    logger.info("평가 기록 로그가 바뀌어 통계를 다시 집계합니다.")
+                self.reset()
+                self.log_file_id = file_id
+            entries, self.log_offset = history_log.read_since(self.log_offset)
+            for entry in entries:
+                self.add_entry(entry)
+            return len(entries)
+
+    def summary(self):
+        return self.overall.to_dict()
+
+    def genre_stats(self):
+        with self._lock:
+            return {genre: stats.to_dict() for genre, stats in self.genres.items()}
+
+    def artist_stats(self):
+        with self._lock:
+            return {artist: stats.to_dict() for artist, stats in self.artists.items()}
+
+    def trend(self, bucket='hour'):
+        """시간순 구간별 통계 [(구간 시작 시각, 평가 수, 평균 평점)]"""
+        if bucket not in BUCKETS:
+            raise ValueError(f"알 수 없는 시간 구간: {bucket}")
+        with self._lock:
+            merged = {}
+            for hour, stats in self.hours.items():
+                merged.setdefault(_bucket_key(hour, bucket), RunningStats()).merge(stats)
+        return [
+            (_bucket_start(key, bucket), merged[key].count, merged[key].mean)
+            for key in sorted(merged)
+        ]
+
+    def trend_points(self, max_points=MAX_TREND_POINTS):
+        """추이 차트용 점 (구간 이름, 구간 시작 시각 목록, 평균 평점 목록)
+
+        구간 수가 max_points를 넘지 않는 가장 작은 시간 구간(시간/일/주)으로 합치고,
+        주 단위로도 넘으면 LTTB로 max_points개만 고르므로 기록 길이와 무관하게 점 수가 일정하다.
+        """
+        span = self.time_span()
+        if span is None:
+            return 'hour', [], []
+        n_hours = int((span[1] - span[0]).total_seconds() // 3600) + 1
+        if n_hours <= max_points:
+            bucket = 'hour'
+        elif n_hours // 24 + 1 <= max_points:
+            bucket = 'day'
+        else:
+            bucket = 'week'
+
+        trend = self.trend(bucket)
+        keep = lttb(np.arange(len(trend)), [mean for _, _, mean in trend], max_points)
+        return bucket, [trend[n][0] for n in keep], [trend[n][2] for n in keep]
+
+    def time_span(self):
+        """첫 평가와 마지막 평가가 속한 시간 구간의 시작 시각 (기록이 없으면 None)"""
+        with self._lock:
+            if not self.hours:
+                return None
+            return _bucket_start(min(self.hours), 'hour'), _bucket_start(max(self.hours), 'hour')
+
+    def save(self):
+        with self._lock, metrics.timer('stats_save'):
+            state = {
+                'format_version': STATS_FORMAT_VERSION,
+                'log_offset': self.log_offset,
+                'log_file_id': self.log_file_id,
+                'overall': self.overall.to_list(),
+                'genres': {genre: stats.to_list() for genre, stats in self.genres.items()},
+                'artists': {artist: stats.to_list() for artist, stats in self.artists.items()},
+                'hours': {str(hour): stats.to_list() for hour, stats in self.hours.items()},
+            }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """저장된 상태를 읽는다 (없거나 읽을 수 없으면 빈 상태로 시작)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('format_version') != STATS_FORMAT_VERSION:
+                raise ValueError(f"지원하지 않는 통계 형식 버전입니다: {state.get('format_version')}")
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            logger.warning(f"{self.path}를 읽을 수 없어 통계를 다시 집계합니다: {str(e)}")
+            return False
+
+        with self._lock:
+            self.reset()
+            self.log_offset = state['log_offset']
+            self.log_file_id = state['log_file_id']
+            self.overall = RunningStats(*state['overall'])
+            self.genres = {genre: RunningStats(*values) for genre, values in state['genres'].items()}
+            self.artists = {artist: RunningStats(*values) for artist, values in state['artists'].items()}
+            self.hours = {int(hour): RunningStats(*values) for hour, values in state['hours'].items()}
+        return True
+
+
+def load_stats(history_log, path=DEFAULT_STATS_PATH, catalog=None):
+    """저장된 통계를 불러와 그 이후에 추가된 평가 기록만 반영한다"""
+    stats = RatingStatsAggregator(path, catalog)
+    stats.load()
+    count = stats.sync(history_log)
+    logger.info(f"평가 통계 준비 완료 (새로 반영한 기록 {count}건, 전체 {stats.overall.count}건)")
+    return stats
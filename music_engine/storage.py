@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+"""사용자, 곡, 평가, 플레이리스트를 저장하는 SQLite(WAL) 저장소
+
+    python -m music_engine.storage migrate [music.db]
+
+migrate는 기존 rating_history.jsonl과 playlists.json / playlist_<이름>.json을 데이터베이스로 옮긴다.
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from . import metrics
+from .catalog import MusicCatalog, load_catalog
+from .history import DEFAULT_LOG_PATH, RatingHistoryLog, ratings_from_history
+from .ratings import RatingsStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = 'music.db'
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS songs (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    genre TEXT,
+    UNIQUE (title, artist)
+);
+CREATE INDEX IF NOT EXISTS songs_genre ON songs (genre);
+CREATE TABLE IF NOT EXISTS ratings (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    song_id INTEGER NOT NULL REFERENCES songs (id),
+    rating REAL NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ratings_user ON ratings (user_id);
+CREATE INDEX IF NOT EXISTS ratings_song ON ratings (song_id);
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlist_entries (
+    playlist_id INTEGER NOT NULL REFERENCES playlists (id),
+    position INTEGER NOT NULL,
+    song_id INTEGER NOT NULL REFERENCES songs (id),
+    PRIMARY KEY (playlist_id, position)
+);
+CREATE INDEX IF NOT EXISTS playlist_entries_song ON playlist_entries (song_id);
+"""
+
+# 자주 쓰는 질의는 SQL 문자열을 고정해 두어 sqlite3 문장 캐시에서 준비된 문장을 재사용한다
+_INSERT_RATING = "INSERT INTO ratings (user_id, song_id, rating, timestamp) VALUES (?, ?, ?, ?)"
+_INSERT_USER = "INSERT OR IGNORE INTO users (id, created_at) VALUES (?, ?)"
+_INSERT_SONG = "INSERT OR IGNORE INTO songs (title, artist, genre) VALUES (?, ?, ?)"
+_SELECT_ALL_RATINGS = "SELECT user_id, song_id, rating, timestamp FROM ratings ORDER BY id"
+_SELECT_RATINGS_UNTIL = "SELECT user_id, song_id, rating, timestamp FROM ratings WHERE id <= ? ORDER BY id"
+_SELECT_RATINGS_AFTER = "SELECT id, user_id, song_id, rating, timestamp FROM ratings WHERE id > ? ORDER BY id"
+_SELECT_USER_RATINGS = "SELECT song_id, rating, timestamp FROM ratings WHERE user_id = ? ORDER BY id"
+_SELECT_HISTORY_PAGE = """
+SELECT r.id, r.timestamp, s.genre, s.title, s.artist, r.rating
+FROM ratings AS r JOIN songs AS s ON s.id = r.song_id
+WHERE r.user_id = ? AND r.id < ?
+ORDER BY r.id DESC
+LIMIT ?
+"""
+_SELECT_GENRE_AGGREGATES = """
+SELECT s.genre, COUNT(*), SUM(r.rating), SUM(r.rating * r.rating)
+FROM ratings AS r JOIN songs AS s ON s.id = r.song_id
+GROUP BY s.genre
+"""
+_SELECT_USER_GENRE_AGGREGATES = """
+SELECT s.genre, COUNT(*), SUM(r.rating), SUM(r.rating * r.rating)
+FROM ratings AS r JOIN songs AS s ON s.id = r.song_id
+WHERE r.user_id = ?
+GROUP BY s.genre
+"""
+_SELECT_PLAYLIST_SONGS = """
+SELECT s.title, s.artist
+FROM playlist_entries AS e JOIN songs AS s ON s.id = e.song_id
+WHERE e.playlist_id = (SELECT id FROM playlists WHERE name = ?)
+ORDER BY e.position
+"""
+
+
+def _split_key(song_key):
+    # "제목 - 아티스트" (아티스트가 없으면 빈 문자열)
+    parts = song_key.rsplit(' - ', 1)
+    return (parts[0], parts[1]) if len(parts) == 2 else (song_key, '')
+
+
+class SQLiteStorage:
+    """WAL 모드 SQLite에 사용자, 곡, 평가, 플레이리스트를 저장한다
+
+    평가 쓰기는 batch_size건 또는 flush_interval초마다 한 트랜잭션의 executemany로 묶어 기록하고,
+    (더 이상 쓰기가 없어도 버퍼에 평가가 들어온 지 flush_interval초 뒤 타이머가 기록한다)
+    읽기 전에는 남은 쓰기를 먼저 반영한다. WAL 모드라 읽기가 쓰기를 막지 않는다.
+    평가는 데이터베이스 곡 ID로 저장하며, register_catalog로 카탈로그 곡 ID와의 대응표를 만든 뒤
+    카탈로그 곡 ID로 읽고 쓴다 (카탈로그가 바뀌어도 제목과 아티스트로 다시 연결된다).
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=256, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._flush_timer = None
+        self._to_db = None
+        self._from_db = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 외래 키 검사는 대량 쓰기를 크게 늦추므로 켜지 않고, 연관 행은 직접 정리한다
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise ValueError(f"지원하지 않는 데이터베이스 버전입니다: {version}")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    # 곡과 사용자
+
+    def register_catalog(self, catalog):
+        """카탈로그의 곡을 songs 테이블에 등록하고 카탈로그 곡 ID <-> 데이터베이스 곡 ID 대응표를 만든다"""
+        titles = catalog.titles.tolist()
+        artists = [catalog.artist_of(song_id) for song_id in catalog.song_ids]
+        genres = [catalog.genre_of(song_id) for song_id in catalog.song_ids]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_SONG, zip(titles, artists, genres))
+            db_ids = {
+                (title, artist): song_id
+                for song_id, title, artist in self._conn.execute("SELECT id, title, artist FROM songs")
+            }
+        self._to_db = np.array([db_ids[key] for key in zip(titles, artists)], dtype=np.int64)
+        self._from_db = np.full(max(db_ids.values(), default=0) + 1, -1, dtype=np.int64)
+        self._from_db[self._to_db] = catalog.song_ids
+        logger.info(f"곡 {len(titles)}개를 데이터베이스 곡 목록과 연결했습니다.")
+
+    def _check_catalog(self):
+        if self._to_db is None:
+            raise RuntimeError("register_catalog를 먼저 호출해야 합니다.")
+
+    def _catalog_ids(self, db_ids):
+        # 데이터베이스 곡 ID -> 카탈로그 곡 ID (카탈로그에 없는 곡은 -1)
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        known = db_ids < len(self._from_db)
+        return np.where(known, self._from_db[np.where(known, db_ids, 0)], -1)
+
+    def _song_db_ids(self, song_keys):
+        # "제목 - 아티스트" -> 데이터베이스 곡 ID (처음 보는 곡은 장르 없이 등록)
+        keys = [_split_key(key) for key in song_keys]
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_SONG, ((title, artist, None) for title, artist in keys))
+            return [
+                self._conn.execute(
+                    "SELECT id FROM songs WHERE title = ? AND artist = ?", key
+                ).fetchone()[0]
+                for key in keys
+            ]
+
+    def ensure_user(self, user_id, name=None):
+        with self._lock, self._conn:
+            self._conn.execute(_INSERT_USER, (user_id, datetime.now().timestamp()))
+            if name is not None:
+                self._conn.execute("UPDATE users SET name = ? WHERE id = ?", (name, user_id))
+
+    # 평가
+
+    def add_rating(self, user_id, song_id, rating, timestamp=None):
+        """평가 한 건을 쓰기 버퍼에 넣는다 (batch_size건 또는 flush_interval초마다 함께 기록)"""
+        self._check_catalog()
+        if not 0 <= song_id < len(self._to_db):
+            logger.warning(f"카탈로그에 없는 곡의 평가는 저장하지 않습니다: {song_id}")
+            return
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        with self._lock:
+            self._pending.append((int(user_id), int(self._to_db[song_id]), float(rating), float(timestamp)))
+            if (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def add_ratings(self, user_ids, song_ids, ratings, timestamps):
+        """여러 평가를 한 트랜잭션으로 기록한다 (카탈로그 곡 ID 기준)"""
+        self._check_catalog()
+        song_ids = np.asarray(song_ids, dtype=np.int64)
+        known = (song_ids >= 0) & (song_ids < len(self._to_db))
+        if not known.all():
+            logger.warning(f"카탈로그에 없는 곡의 평가 {int((~known).sum())}건은 저장하지 않습니다.")
+        user_ids = np.asarray(user_ids, dtype=np.int64)[known]
+        rows = zip(
+            user_ids.tolist(),
+            self._to_db[song_ids[known]].tolist(),
+            np.asarray(ratings, dtype=np.float64)[known].tolist(),
+            np.asarray(timestamps, dtype=np.float64)[known].tolist(),
+        )
+        now = datetime.now().timestamp()
+        with self._lock:
+            self.flush()
+            with self._conn:
+                self._conn.executemany(_INSERT_USER, ((user_id, now) for user_id in np.unique(user_ids).tolist()))
+                self._conn.executemany(_INSERT_RATING, rows)
+        return int(known.sum())
+
+    def flush(self):
+        """쓰기 버퍼의 평가를 한 트랜잭션으로 기록한다"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._pending and self._conn is not None:
+                users = {row[0] for row in self._pending}
+                now = datetime.now().timestamp()
+                with metrics.timer('storage_flush'), self._conn:
+                    self._conn.executemany(_INSERT_USER, ((user_id, now) for user_id in users))
+                    self._conn.executemany(_INSERT_RATING, self._pending)
+                self._pending = []
+            self._last_flush = time.monotonic()
+
+    def count_ratings(self):
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+
+    def last_rating_id(self):
+        """가장 최근에 기록된 평가의 ID (평가가 없으면 0)"""
+        with self._lock:
+            self.flush()
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM ratings").fetchone()[0]
+
+    def load_ratings_store(self, chunk_size=65536, until_id=None):
+        """전체 평가(until_id를 주면 그 ID까지)를 한 번의 질의로 읽어 RatingsStore를 만든다
+
+        카탈로그에 없는 곡의 평가는 제외한다.
+        """
+        self._check_catalog()
+        with self._lock, metrics.timer('storage_load'):
+            self.flush()
+            count = self._conn.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+            store = RatingsStore(capacity=count)
+            if until_id is None:
+                cursor = self._conn.execute(_SELECT_ALL_RATINGS)
+            else:
+                cursor = self._conn.execute(_SELECT_RATINGS_UNTIL, (until_id,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                block = np.array(rows, dtype=np.float64)
+                song_ids = self._catalog_ids(block[:, 1].astype(np.int64))
+                known = song_ids >= 0
+                store.extend(block[known, 0], song_ids[known], block[known, 2], block[known, 3])
+        if len(store) < count:
+            logger.warning(f"카탈로그에 없는 곡의 평가 {count - len(store)}건을 제외했습니다.")
+        logger.info(f"데이터베이스에서 평가 {len(store)}건을 불러왔습니다.")
+        return store
+
+    def ratings_after(self, rating_id):
+        """rating_id 이후에 기록된 평가 (마지막 평가 ID, 사용자 ID, 카탈로그 곡 ID, 평점, 시각 배열)
+
+        다른 프로세스가 기록한 평가를 따라잡을 때 쓴다. 새 평가가 없으면 rating_id를 그대로 돌려준다.
+        """
+        self._check_catalog()
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(_SELECT_RATINGS_AFTER, (rating_id,)).fetchall()
+        block = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        last_id = int(block[-1, 0]) if len(block) else rating_id
+        song_ids = self._catalog_ids(block[:, 2].astype(np.int64))
+        known = song_ids >= 0
+        return last_id, block[known, 1], song_ids[known], block[known, 3], block[known, 4]
+
+    def ratings_by_user(self, user_id):
+        """사용자의 평가 (카탈로그 곡 ID 배열, 평점 배열, 시각 배열), 평가한 순서"""
+        self._check_catalog()
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(_SELECT_USER_RATINGS, (user_id,)).fetchall()
+        block = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        song_ids = self._catalog_ids(block[:, 0].astype(np.int64))
+        known = song_ids >= 0
+        return song_ids[known], block[known, 1], block[known, 2]
+
+    def history_page(self, user_id, limit=20, before=None):
+        """최신순 평가 기록 한 쪽과 다음 쪽을 읽을 커서 (마지막 쪽이면 None)
+
+        before는 이전 쪽에서 받은 커서이며, 평가 ID 기준의 키셋 페이지 나누기라
+        몇 번째 쪽이든 ratings_user 색인에서 limit건만 읽는다.
+        """
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                _SELECT_HISTORY_PAGE, (user_id, before if before is not None else 2 ** 63 - 1, limit)
+            ).fetchall()
+        page = [
+            {
+                'timestamp': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+                'genre': genre,
+                'song_info': f"{title} - {artist}",
+                'rating': rating,
+            }
+            for _, timestamp, genre, title, artist, rating in rows
+        ]
+        return page, (rows[-1][0] if len(rows) == limit else None)
+
+    def genre_aggregates(self, user_id=None):
+        """장르별 평가 수, 평균, 표준편차 {장르: {'count', 'mean', 'std'}} (user_id가 없으면 전체)"""
+        with self._lock:
+            self.flush()
+            if user_id is None:
+                rows = self._conn.execute(_SELECT_GENRE_AGGREGATES).fetchall()
+            else:
+                rows = self._conn.execute(_SELECT_USER_GENRE_AGGREGATES, (user_id,)).fetchall()
+        aggregates = {}
+        for genre, count, total, total_sq in rows:
+            mean = total / count
+            aggregates[genre] = {
+                'count': count,
+                'mean': mean,
+                'std': max(total_sq / count - mean ** 2, 0.0) ** 0.5,
+            }
+        return aggregates
+
+    # 플레이리스트
+
+    def playlists(self):
+        with self._lock:
+            return [name for name, in self._conn.execute("SELECT name FROM playlists ORDER BY id")]
+
+    def create_playlist(self, name):
+        """플레이리스트를 만든다 (이미 있으면 False)"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO playlists (name, created_at) VALUES (?, ?)",
+                (name, datetime.now().timestamp())
+            )
+            return cursor.rowcount > 0
+
+    def delete_playlist(self, name):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM playlist_entries WHERE playlist_id = (SELECT id FROM playlists WHERE name = ?)",
+                (name,)
+            )
+            return self._conn.execute("DELETE FROM playlists WHERE name = ?", (name,)).rowcount > 0
+
+    def playlist_songs(self, name):
+        """플레이리스트의 곡 ["제목 - 아티스트"] (순서대로)"""
+        with self._lock:
+            rows = self._conn.execute(_SELECT_PLAYLIST_SONGS, (name,)).fetchall()
+        return [f"{title} - {artist}" for title, artist in rows]
+
+    def set_playlist_songs(self, name, song_keys):
+        """플레이리스트의 곡 목록을 바꾼다 (플레이리스트가 없으면 만든다)"""
+        song_ids = self._song_db_ids(song_keys)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO playlists (name, created_at) VALUES (?, ?)",
+                (name, datetime.now().timestamp())
+            )
+            playlist_id = self._conn.execute(
+                "SELECT id FROM playlists WHERE name = ?", (name,)
+            ).fetchone()[0]
+            self._conn.execute("DELETE FROM playlist_entries WHERE playlist_id = ?", (playlist_id,))
+            self._conn.executemany(
+                "INSERT INTO playlist_entries (playlist_id, position, song_id) VALUES (?, ?, ?)",
+                ((playlist_id, position, song_id) for position, song_id in enumerate(song_ids))
+            )
+
+    # 기존 파일에서 옮기기
+
+    def migrate_history(self, history_log, catalog, user_id=1):
+        """평가 테이블이 비어 있으면 GUI 평가 기록 로그를 user_id의 평가로 옮긴다 (옮긴 건수 반환)"""
+        if self.count_ratings():
+            return 0
+        ratings = ratings_from_history(history_log.entries(), catalog, user_id)
+        if not len(ratings):
+            return 0
+        self.ensure_user(user_id)
+        count = self.add_ratings(ratings.user_ids, ratings.song_ids, ratings.values, ratings.timestamps)
+        logger.info(f"평가 기록 {count}건을 데이터베이스로 옮겼습니다.")
+        return count
+
+    def migrate_playlists(self, list_path='playlists.json', directory='.'):
+        """플레이리스트 테이블이 비어 있으면 playlists.json과 playlist_<이름>.json을 옮긴다"""
+        with self._lock:
+            if self._conn.execute("SELECT COUNT(*) FROM playlists").fetchone()[0]:
+                return 0
+        try:
+            with open(os.path.join(directory, list_path), 'r', encoding='utf-8') as f:
+                names = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+
+        for name in names:
+            try:
+                with open(os.path.join(directory, f'playlist_{name}.json'), 'r', encoding='utf-8') as f:
+                    songs = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                songs = []
+            self.set_playlist_songs(name, songs)
+        logger.info(f"플레이리스트 {len(names)}개를 데이터베이스로 옮겼습니다.")
+        return len(names)
+
+
+def open_storage(path=DEFAULT_DB_PATH, catalog=None, history_log=None, user_id=1):
+    """저장소를 열고 카탈로그를 연결한 뒤, 처음 여는 경우 기존 평가 기록과 플레이리스트를 옮긴다"""
+    if catalog is None:
+        catalog = MusicCatalog()
+    storage = SQLiteStorage(path)
+    storage.register_catalog(catalog)
+    storage.ensure_user(user_id)
+    if history_log is not None:
+        storage.migrate_history(history_log, catalog, user_id)
+    storage.migrate_playlists()
+    return storage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQLite 저장소 관리")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help="기존 평가 기록과 플레이리스트 파일을 옮긴다")
+    migrate_parser.add_argument('path', nargs='?', default=DEFAULT_DB_PATH)
+    migrate_parser.add_argument('--history', default=DEFAULT_LOG_PATH)
+    migrate_parser.add_argument('--catalog', help="곡 카탈로그 파일 (없으면 기본 카탈로그)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    catalog = load_catalog(args.catalog) if args.catalog else MusicCatalog()
+    storage = open_storage(args.path, catalog, RatingHistoryLog(args.history))
+    print(json.dumps({
+        'ratings': storage.count_ratings(),
+        'playlists': len(storage.playlists()),
+    }, ensure_ascii=False))
+    storage.close()
+
+
+if __name__ == '__main__':
+    main()
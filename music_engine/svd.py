@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 저장 형식 버전 (배열 구성이 바뀌면 올린다)
+MODEL_FORMAT_VERSION = 1
+MODEL_ARRAYS = ['bu', 'bi', 'pu', 'qi', 'user_ids', 'item_ids']
+
+
+class ModelFormatError(ValueError):
+    pass
+
+
+class IncrementalSVD:
+    """점진적으로 갱신할 수 있는 편향 SVD 모델
+
+    surprise의 SVD와 같은 예측식(mu + bu + bi + pu·qi)과 학습 파라미터를 쓰지만,
+    한 번 학습한 뒤에는 새 평가에 대해서만 몇 번의 SGD 패스로 갱신한다.
+    """
+
+    def __init__(self, n_factors=100, n_epochs=20, lr_all=0.005, reg_all=0.02,
+                 init_std_dev=0.1, rating_scale=(1, 5), update_epochs=3,
+                 batch_size=256, random_state=None):
+        self.n_factors = n_factors
+        self.n_epochs = n_epochs
+        self.lr_all = lr_all
+        self.reg_all = reg_all
+        self.init_std_dev = init_std_dev
+        self.rating_scale = rating_scale
+        self.update_epochs = update_epochs
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(random_state)
+
+        self.user_index = {}
+        self.item_index = {}
+        self.global_mean = 0.0
+        self.bu = np.zeros(0)
+        self.bi = np.zeros(0)
+        self.pu = np.zeros((0, n_factors))
+        self.qi = np.zeros((0, n_factors))
+        self.n_trained = 0
+        self.n_updates = 0
+
+    @property
+    def is_fitted(self):
+        return self.n_trained > 0
+
+    def fit(self, user_ids, item_ids, ratings):
+        user_index = {}
+        item_index = {}
+        users = self._inner_ids(user_index, user_ids)
+        items = self._inner_ids(item_index, item_ids)
+        return self.fit_encoded(users, items, ratings, list(user_index), list(item_index))
+
+    def fit_encoded(self, users, items, ratings, user_ids, item_ids, n_epochs=None):
+        """내부 인덱스(0부터 시작, user_ids[u]가 u의 원본 ID)로 바꿔 둔 평가로 전체 학습한다
+
+        n_epochs=0이면 파라미터만 초기화하므로 train_epochs로 한 epoch씩 학습할 수 있다.
+        """
+        ratings = np.asarray(ratings, dtype=np.float64)
+        self.user_index = {raw: inner for inner, raw in enumerate(user_ids)}
+        self.item_index = {raw: inner for inner, raw in enumerate(item_ids)}
+
+        self.global_mean = float(ratings.mean()) if len(ratings) else 0.0
+        self.bu = np.zeros(len(self.user_index))
+        self.bi = np.zeros(len(self.item_index))
+        self.pu = self._init_factors(len(self.user_index))
+        self.qi = self._init_factors(len(self.item_index))
+
+        self.n_trained = len(ratings)
+        self.n_updates = 0
+        return self.train_epochs(users, items, ratings, self.n_epochs if n_epochs is None else n_epochs)
+
+    def train_epochs(self, users, items, ratings, n_epochs=1):
+        """fit_encoded와 같은 내부 인덱스 평가로 SGD epoch을 더 수행한다"""
+        self._sgd(users, items, np.asarray(ratings, dtype=np.float64), n_epochs)
+        return self
+
+    def partial_fit(self, user_ids, item_ids, ratings):
+        if not self.is_fitted:
+            return self.fit(user_ids, item_ids, ratings)
+
+        ratings = np.asarray(ratings, dtype=np.float64)
+        users = self._inner_ids(self.user_index, user_ids)
+        items = self._inner_ids(self.item_index, item_ids)
+        self._grow()
+
+        # 전역 평균은 누적 평균으로 갱신
+        total = self.n_trained + self.n_updates
+        self.global_mean = (self.global_mean * total + ratings.sum()) / (total + len(ratings))
+
+        self._sgd(users, items, ratings, self.update_epochs)
+        self.n_updates += len(ratings)
+        return self
+
+    def drift(self):
+        """마지막 전체 학습 이후 점진적으로 반영된 평가의 비율"""
+        return self.n_updates / max(self.n_trained, 1)
+
+    def predict(self, user_id, item_id):
+        est = self.global_mean
+        u = self.user_index.get(user_id)
+        i = self.item_index.get(item_id)
+        if u is not None:
+            est += self.bu[u]
+        if i is not None:
+            est += self.bi[i]
+        if u is not None and i is not None:
+            est += np.dot(self.pu[u], self.qi[i])
+        low, high = self.rating_scale
+        return float(min(high, max(low, est)))
+
+    def predict_many(self, user_ids, item_ids):
+        """(사용자, 곡) 쌍 배열의 예측 평점을 한 번에 계산한다"""
+        users = np.fromiter((self.user_index.get(u, -1) for u in user_ids), dtype=np.int64,
+                            count=len(user_ids))
+        items = self.inner_item_ids(item_ids)
+        known_users = users >= 0
+        known_items = items >= 0
+        safe_users = np.where(known_users, users, 0)
+        safe_items = np.where(known_items, items, 0)
+
+        est = np.full(len(users), self.global_mean)
+        if len(self.bu):
+            est += np.where(known_users, self.bu[safe_users], 0.0)
+        if len(self.bi):
+            est += np.where(known_items, self.bi[safe_items], 0.0)
+        if len(self.bu) and len(self.bi):
+            dots = np.einsum('ij,ij->i', self.pu[safe_users], self.qi[safe_items])
+            est += np.where(known_users & known_items, dots, 0.0)
+        low, high = self.rating_scale
+        return np.clip(est, low, high, out=est)
+
+    def inner_item_ids(self, item_ids):
+        """원본 곡 ID 배열을 모델 내부 인덱스로 변환 (모르는 곡은 -1)"""
+        index = self.item_index
+        return np.fromiter((index.get(i, -1) for i in item_ids), dtype=np.int64, count=len(item_ids))
+
+    def score_items(self, user_id, inner_items):
+        """inner_items 전체에 대한 예측 평점을 한 번의 행렬 곱으로 계산한다"""
+        known = inner_items >= 0
+        safe = np.where(known, inner_items, 0)
+        scores = np.full(len(inner_items), self.global_mean)
+        scores += np.where(known, self.bi[safe], 0.0) if len(self.bi) else 0.0
+
+        u = self.user_index.get(user_id)
+        if u is not None:
+            scores += self.bu[u]
+            if len(self.qi):
+                scores += np.where(known, self.qi[safe] @ self.pu[u], 0.0)
+
+        low, high = self.rating_scale
+        return np.clip(scores, low, high, out=scores)
+
+    def top_k(self, user_id, inner_items, k, exclude_mask=None):
+        """예측 평점 상위 k개의 위치와 점수를 반환한다 (exclude_mask가 True인 위치는 제외)"""
+        scores = self.score_items(user_id, inner_items)
+        if exclude_mask is not None:
+            scores[exclude_mask] = -np.inf
+
+        n_candidates = len(scores) - (int(exclude_mask.sum()) if exclude_mask is not None else 0)
+        k = min(k, n_candidates)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
+    def top_k_many(self, user_ids, inner_items, k, exclude=None, block_size=1024):
+        """여러 사용자의 상위 k개를 사용자 블록 단위 행렬 곱으로 계산한다
+
+        exclude는 (사용자 위치 배열, 후보 위치 배열) 쌍으로, 해당 조합은 결과에서 제외된다.
+        반환값은 사용자별 (후보 위치 배열, 점수 배열) 목록이다.
+        """
+        low, high = self.rating_scale
+        known_items = inner_items >= 0
+        safe_items = np.where(known_items, inner_items, 0)
+        item_bias = np.where(known_items, self.bi[safe_items], 0.0) + self.global_mean
+        item_factors = self.qi[safe_items] * known_items[:, None]
+
+        users = np.fromiter(
+            (self.user_index.get(u, -1) for u in user_ids), dtype=np.int64, count=len(user_ids)
+        )
+        if exclude is not None:
+            exclude_rows, exclude_cols = exclude
+            order = np.argsort(exclude_rows, kind='stable')
+            exclude_rows, exclude_cols = exclude_rows[order], exclude_cols[order]
+
+        k = min(k, len(inner_items))
+        results = []
+        for start in range(0, len(users), block_size):
+            block = users[start:start + block_size]
+            known_users = block >= 0
+            safe_users = np.where(known_users, block, 0)
+            user_bias = np.where(known_users, self.bu[safe_users], 0.0)
+            user_factors = self.pu[safe_users] * known_users[:, None]
+
+            scores = user_factors @ item_factors.T
+            scores += item_bias[None, :]
+            scores += user_bias[:, None]
+            np.clip(scores, low, high, out=scores)
+
+            if exclude is not None:
+                lo, hi = np.searchsorted(exclude_rows, [start, start + len(block)])
+                scores[exclude_rows[lo:hi] - start, exclude_cols[lo:hi]] = -np.inf
+
+            if k <= 0:
+                results.extend((np.empty(0, dtype=np.int64), np.empty(0)) for _ in block)
+                continue
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for row_top, row_scores in zip(top, top_scores):
+                valid = np.isfinite(row_scores)
+                results.append((row_top[valid], row_scores[valid]))
+
+        return results
+
+    def save(self, path, fingerprint=None):
+        """모델을 디렉터리(meta.json + 배열별 .npy)에 저장한다
+
+        .npy 파일은 압축하지 않으므로 load에서 메모리 매핑할 수 있다.
+        fingerprint에는 학습에 사용한 평가 데이터의 지문을 기록한다.
+        """
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        arrays = {
+            'bu': self.bu,
+            'bi': self.bi,
+            'pu': self.pu,
+            'qi': self.qi,
+            'user_ids': np.asarray(list(self.user_index), dtype=np.int64),
+            'item_ids': np.asarray(list(self.item_index), dtype=np.int64),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f'{name}.npy'), array)
+
+        meta = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'params': {
+                'n_factors': self.n_factors,
+                'n_epochs': self.n_epochs,
+                'lr_all': self.lr_all,
+                'reg_all': self.reg_all,
+                'init_std_dev': self.init_std_dev,
+                'rating_scale': list(self.rating_scale),
+                'update_epochs': self.update_epochs,
+                'batch_size': self.batch_size,
+            },
+            'global_mean': self.global_mean,
+            'n_trained': self.n_trained,
+            'n_updates': self.n_updates,
+            'fingerprint': fingerprint,
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        # 기존 모델은 새 모델을 완전히 쓴 뒤에 교체
+        old_path = path + '.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        logger.info(f"SVD 모델 저장 완료: {path}")
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """save로 저장한 모델을 읽는다 (반환값: (모델, 평가 데이터 지문))
+
+        mmap이 True이면 배열을 copy-on-write로 메모리 매핑하므로
+        시작 비용이 거의 없고, 점진 갱신 시 바뀐 페이지만 메모리에 복사된다.
+        """
+        try:
+            with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ModelFormatError(f"모델 메타데이터를 읽을 수 없습니다: {path}") from e
+        if meta.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ModelFormatError(f"지원하지 않는 모델 형식 버전입니다: {meta.get('format_version')}")
+
+        params = dict(meta['params'])
+        params['rating_scale'] = tuple(params['rating_scale'])
+        model = cls(**params)
+        mmap_mode = 'c' if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in MODEL_ARRAYS
+        }
+
+        model.bu = arrays['bu']
+        model.bi = arrays['bi']
+        model.pu = arrays['pu']
+        model.qi = arrays['qi']
+        model.user_index = {int(raw): inner for inner, raw in enumerate(arrays['user_ids'])}
+        model.item_index = {int(raw): inner for inner, raw in enumerate(arrays['item_ids'])}
+        model.global_mean = meta['global_mean']
+        model.n_trained = meta['n_trained']
+        model.n_updates = meta['n_updates']
+        return model, meta.get('fingerprint')
+
+    def _init_factors(self, n):
+        return self.rng.normal(0, self.init_std_dev, (n, self.n_factors))
+
+    def _inner_ids(self, index, raw_ids):
+        inner = np.empty(len(raw_ids), dtype=np.int64)
+        for n, raw in enumerate(raw_ids):
+            inner[n] = index.setdefault(raw, len(index))
+        return inner
+
+    def _grow(self):
+        # 처음 보는 사용자/곡에 대한 파라미터 추가
+        n_new = len(self.user_index) - len(self.bu)
+        if n_new > 0:
+            self.bu = np.concatenate([self.bu, np.zeros(n_new)])
+            self.pu = np.vstack([self.pu, self._init_factors(n_new)])
+        n_new = len(self.item_index) - len(self.bi)
+        if n_new > 0:
+            self.bi = np.concatenate([self.bi, np.zeros(n_new)])
+            self.qi = np.vstack([self.qi, self._init_factors(n_new)])
+
+    def _sgd(self, users, items, ratings, n_epochs):
+        lr = self.lr_all
+        reg = self.reg_all
+        n = len(ratings)
+        for _ in range(n_epochs):
+            order = self.rng.permutation(n)
+            for start in range(0, n, self.batch_size):
+                batch = order[start:start + self.batch_size]
+                u = users[batch]
+                i = items[batch]
+                pu = self.pu[u]
+                qi = self.qi[i]
+                err = ratings[batch] - (
+                    self.global_mean + self.bu[u] + self.bi[i] + np.einsum('ij,ij->i', pu, qi)
+                )
+
+                # 미니배치 단위로 SGD 갱신 (같은 사용자/곡의 기울기는 합산)
+                np.add.at(self.bu, u, lr * (err - reg * self.bu[u]))
+                np.add.at(self.bi, i, lr * (err - reg * self.bi[i]))
+                np.add.at(self.pu, u, lr * (err[:, None] * qi - reg * pu))
+                np.add.at(self.qi, i, lr * (err[:, None] * pu - reg * qi))
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""협업 필터링 SVD 하이퍼파라미터 탐색
+
+    python -m music_engine.tuning --ratings ratings.parquet --trials 27 --n-jobs 4
+
+무작위로 뽑은 설정을 successive halving으로 추려 나가며, 각 시도는 검증 RMSE가
+patience epoch 동안 좋아지지 않으면 조기 종료한다. 가장 좋은 설정은 svd_params.json에 저장되고
+load_tuned_params()로 불러와 RecommenderEngine(svd_params=...)에 넘길 수 있다.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .catalog import MusicCatalog, load_catalog
+from .evaluation import make_splits
+from .history import DEFAULT_LOG_PATH, RatingHistoryLog, ratings_from_history
+from .ratings import load_ratings
+from .recommenders import DEFAULT_SVD_PARAMS
+from .svd import IncrementalSVD
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARAMS_PATH = 'svd_params.json'
+
+# 탐색 공간: n_factors는 후보 중 하나, 학습률과 정규화는 로그 균등 분포
+SEARCH_SPACE = {
+    'n_factors': [5, 10, 20, 50, 100],
+    'lr_all': (0.001, 0.03),
+    'reg_all': (0.005, 0.2),
+}
+STRATEGIES = ('halving', 'random')
+
+
+def sample_params(rng, space=SEARCH_SPACE):
+    params = {}
+    for name, values in space.items():
+        if isinstance(values, list):
+            params[name] = values[rng.integers(len(values))]
+        else:
+            low, high = values
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    return params
+
+
+def halving_budgets(min_epochs, max_epochs, eta=3):
+    """단계별 누적 epoch 예산 (min_epochs에서 eta배씩 늘려 max_epochs까지)"""
+    budgets = [min_epochs]
+    while budgets[-1] < max_epochs:
+        budgets.append(min(budgets[-1] * eta, max_epochs))
+    return budgets
+
+
+# 프로세스 풀 워커마다 한 번만 설정되는 학습/검증 데이터 (내부 인덱스로 변환해 둠)
+_worker_data = {}
+
+
+def _init_worker(train, valid):
+    # factorize는 처음 나온 순서대로 번호를 매기므로 IncrementalSVD.fit과 같은 내부 인덱스가 된다
+    users, user_ids = pd.factorize(train[0])
+    items, item_ids = pd.factorize(train[1])
+    _worker_data.update(
+        users=users,
+        items=items,
+        ratings=np.asarray(train[2], dtype=np.float64),
+        user_ids=user_ids.tolist(),
+        item_ids=item_ids.tolist(),
+        valid_users=pd.Index(user_ids).get_indexer(valid[0]),
+        valid_items=pd.Index(item_ids).get_indexer(valid[1]),
+        valid_ratings=np.asarray(valid[2], dtype=np.float64),
+    )
+
+
+def validation_rmse(model, users, items, ratings):
+    """내부 인덱스(-1은 학습에 없던 사용자/곡)로 바꾼 검증 평가에 대한 RMSE"""
+    known_users = users >= 0
+    known_items = items >= 0
+    safe_users = np.where(known_users, users, 0)
+    safe_items = np.where(known_items, items, 0)
+    est = model.global_mean + np.where(known_users, model.bu[safe_users], 0.0)
+    est += np.where(known_items, model.bi[safe_items], 0.0)
+    dots = np.einsum('ij,ij->i', model.pu[safe_users], model.qi[safe_items])
+    est += np.where(known_users & known_items, dots, 0.0)
+    low, high = model.rating_scale
+    errors = np.clip(est, low, high) - ratings
+    return float(np.sqrt(np.mean(errors ** 2))) if len(errors) else float('nan')
+
+
+def _run_trial(trial, budget, patience, random_state):
+    """시도를 누적 budget epoch까지 (또는 조기 종료까지) 학습하고 상태를 돌려준다"""
+    data = _worker_data
+    model = trial.get('model')
+    if model is None:
+        model = IncrementalSVD(
+            **dict(trial['params'], n_epochs=0), random_state=random_state + trial['id']
+        )
+        model.fit_encoded(data['users'], data['items'], data['ratings'],
+                          data['user_ids'], data['item_ids'], n_epochs=0)
+
+    history = trial['history']
+    while len(history) < budget and not trial['stopped']:
+        model.train_epochs(data['users'], data['items'], data['ratings'], 1)
+        rmse = validation_rmse(model, data['valid_users'], data['valid_items'], data['valid_ratings'])
+        history.append(rmse)
+        best_epoch = int(np.nanargmin(history)) if not np.all(np.isnan(history)) else 0
+        if len(history) - 1 - best_epoch >= patience:
+            trial['stopped'] = True
+
+    best_epoch = int(np.nanargmin(history)) if not np.all(np.isnan(history)) else len(history) - 1
+    trial.update(model=model, best_epoch=best_epoch + 1, best_rmse=history[best_epoch])
+    return trial
+
+
+def tune(ratings, n_trials=27, strategy='halving', min_epochs=3, max_epochs=60, eta=3,
+         patience=3, valid_fraction=0.1, split='random', n_jobs=None, random_state=0):
+    """SVD 설정을 탐색해 가장 좋은 설정과 모든 시도 기록을 반환한다
+
+    halving은 예산 단계마다 검증 RMSE 상위 1/eta개의 시도만 이어서 학습하고,
+    random은 모든 시도를 max_epochs까지 (조기 종료 포함) 학습한다.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"알 수 없는 탐색 방식: {strategy}")
+    # 시간순 분할의 마지막 분할(가장 최근 평가)이나 무작위 분할 하나를 검증용으로 쓴다
+    n_folds = max(2, round(1 / valid_fraction) - (1 if split == 'time' else 0))
+    train_rows, valid_rows = make_splits(ratings, n_folds, split, random_state)[-1]
+    columns = [ratings.user_ids, ratings.song_ids, ratings.values]
+    train = [column[train_rows] for column in columns]
+    valid = [column[valid_rows] for column in columns]
+
+    rng = np.random.default_rng(random_state)
+    trials = [
+        {'id': n, 'params': sample_params(rng), 'history': [], 'stopped': False}
+        for n in range(n_trials)
+    ]
+    budgets = halving_budgets(min_epochs, max_epochs, eta) if strategy == 'halving' else [max_epochs]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, n_trials)
+    logger.info(
+        f"SVD 하이퍼파라미터 탐색 중... (학습 {len(train_rows)}개, 검증 {len(valid_rows)}개, "
+        f"시도 {n_trials}개, 단계별 epoch {budgets}, 프로세스 {n_jobs}개)"
+    )
+
+    executor = None
+    if n_jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                       initargs=(train, valid))
+    else:
+        _init_worker(train, valid)
+
+    finished = {}
+    try:
+        active = trials
+        for rung, budget in enumerate(budgets):
+            args = ([budget] * len(active), [patience] * len(active), [random_state] * len(active))
+            if executor is not None:
+                active = list(executor.map(_run_trial, active, *args))
+            else:
+                active = [_run_trial(trial, *rest) for trial, *rest in zip(active, *args)]
+            for trial in active:
+                finished[trial['id']] = trial
+            active.sort(key=lambda trial: trial['best_rmse'])
+            logger.info(
+                f"{rung + 1}단계 ({budget} epoch): 최고 검증 RMSE {active[0]['best_rmse']:.4f}"
+            )
+
+            # 다음 단계로 올라갈 상위 시도 (조기 종료된 시도는 더 학습하지 않는다)
+            keep = max(1, math.ceil(len(active) / eta))
+            active = [trial for trial in active[:keep] if not trial['stopped']]
+            if not active:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    results = sorted(finished.values(), key=lambda trial: trial['best_rmse'])
+    best = results[0]
+    best_params = dict(best['params'], n_epochs=best['best_epoch'])
+    logger.info(f"최적 설정: {best_params} (검증 RMSE {best['best_rmse']:.4f})")
+    return {
+        'params': best_params,
+        'validation_rmse': best['best_rmse'],
+        'n_ratings': len(ratings),
+        'strategy': strategy,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'trials': [
+            {
+                'params': trial['params'],
+                'epochs': len(trial['history']),
+                'best_epoch': trial['best_epoch'],
+                'best_rmse': trial['best_rmse'],
+                'stopped_early': trial['stopped'],
+            }
+            for trial in results
+        ],
+    }
+
+
+def save_tuned_params(result, path=DEFAULT_PARAMS_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    logger.info(f"최적 SVD 설정 저장 완료: {path}")
+
+
+def load_tuned_params(path=DEFAULT_PARAMS_PATH):
+    """저장된 최적 설정 (없거나 읽을 수 없으면 None)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            params = json.load(f)['params']
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError):
+        logger.warning(f"{path}를 읽을 수 없어 기본 SVD 설정을 사용합니다.")
+        return None
+    return {name: value for name, value in params.items() if name in DEFAULT_SVD_PARAMS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="협업 필터링 SVD 하이퍼파라미터 탐색")
+    parser.add_argument('--ratings', help="평가 덤프 (user_id, song_id, rating, timestamp 열의 CSV/Parquet/JSONL)")
+    parser.add_argument('--history', default=DEFAULT_LOG_PATH,
+                        help="--ratings가 없을 때 사용할 GUI 평가 기록 로그")
+    parser.add_argument('--catalog', help="곡 카탈로그 파일 (없으면 기본 카탈로그)")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='halving')
+    parser.add_argument('--trials', type=int, default=27)
+    parser.add_argument('--min-epochs', type=int, default=3)
+    parser.add_argument('--max-epochs', type=int, default=60)
+    parser.add_argument('--eta', type=int, default=3, help="단계마다 남길 시도 비율의 역수")
+    parser.add_argument('--patience', type=int, default=3,
+                        help="검증 RMSE가 좋아지지 않으면 멈출 epoch 수")
+    parser.add_argument('--valid-fraction', type=float, default=0.1)
+    parser.add_argument('--split', choices=('random', 'time'), default='random')
+    parser.add_argument('--n-jobs', type=int, help="시도를 병렬로 학습할 프로세스 수")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_PARAMS_PATH, help="최적 설정을 저장할 파일")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.ratings:
+        ratings = load_ratings(args.ratings)
+    else:
+        catalog = load_catalog(args.catalog) if args.catalog else MusicCatalog()
+        ratings = ratings_from_history(RatingHistoryLog(args.history).entries(), catalog)
+
+    result = tune(
+        ratings, args.trials, args.strategy, args.min_epochs, args.max_epochs, args.eta,
+        args.patience, args.valid_fraction, args.split, args.n_jobs, args.seed
+    )
+    save_tuned_params(result, args.output)
+    print(json.dumps(result['params'], ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """요청을 하나씩 처리하는 오래 사는 백그라운드 작업 스레드
+
+    대기 중인 요청은 항상 하나뿐이다. 새 요청이 들어오면 대기 중이던 요청은 취소되고,
+    실행 중이거나 대기 중인 요청과 key가 같으면 새로 만들지 않고 그 요청에 합쳐진다.
+    결과는 스레드 안전한 큐에 쌓이며, 호출한 쪽(예: Tk 메인 스레드)이 poll로 가져간다.
+    이미 더 새로운 요청이 들어온 뒤에 끝난 작업의 결과는 버린다.
+    """
+
+    def __init__(self, name='background-worker'):
+        self.name = name
+        self._cond = threading.Condition()
+        self._results = queue.Queue()
+        self._pending = None
+        self._running = None
+        self._next_ticket = 0
+        self._thread = None
+        self._closed = False
+
+    def submit(self, key, func, *args):
+        """작업을 예약하고 티켓 번호를 반환한다"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("이미 종료된 작업 스레드입니다.")
+            if self._pending is not None and self._pending[1] == key:
+                return self._pending[0]
+            if self._pending is None and self._running is not None and self._running[1] == key:
+                return self._running[0]
+
+            if self._pending is not None:
+                logger.debug(f"대기 중이던 작업 취소: {self._pending[1]}")
+            self._next_ticket += 1
+            self._pending = (self._next_ticket, key, func, args)
+            self._ensure_thread()
+            self._cond.notify()
+            return self._next_ticket
+
+    @property
+    def latest_ticket(self):
+        return self._next_ticket
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._pending is not None or self._running is not None
+
+    def poll(self):
+        """완료된 최신 작업의 결과 목록 [(티켓, 결과, 예외)]"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self, timeout=None):
+        """대기 중인 요청을 버리고 스레드를 멈춘다 (timeout 안에 실행 중인 작업이 끝났으면 True)"""
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._running = self._pending
+                self._pending = None
+
+            ticket, key, func, args = self._running
+            result, error = None, None
+            try:
+                result = func(*args)
+            except Exception as e:
+                logger.error(f"백그라운드 작업 중 오류 발생: {str(e)}")
+                error = e
+
+            with self._cond:
+                self._running = None
+                # 실행 중에 더 새로운 요청이 들어왔으면 결과를 버린다
+                if ticket == self._next_ticket:
+                    self._results.put((ticket, result, error))